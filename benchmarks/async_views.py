@@ -0,0 +1,151 @@
+"""
+Sync vs async views at high concurrency.
+
+Runs the same mix of requests (course list, course detail, category detail,
+quiz submission) once against the sync views and once against their async
+variants under /async/, and reports throughput and latency of both. Slow
+clients, which download a course a few KiB at a time the whole run, can be
+added to show what they cost each kind of server: a sync worker thread is
+busy until its response has been sent, an async view is not.
+
+Start the servers to compare, e.g. gunicorn for the sync views and uvicorn
+for the async ones (one uvicorn for both URLs also works):
+
+    gunicorn config.wsgi:application --worker-class gthread --threads 8 --bind 127.0.0.1:8000
+    uvicorn config.asgi:application --port 8001
+
+    python -m benchmarks.async_views --sync-url http://127.0.0.1:8000 --async-url http://127.0.0.1:8001 \\
+        --concurrency 256 --slow-clients 32 --duration 20 --email user@example.com --password string \\
+        --output async.json
+"""
+import argparse
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.load_test import Catalog, Client, Recorder, get_token, git_revision, print_results, save_results
+
+
+def slow_client(base_url, path, stop, completed, chunk_size=4096, interval=0.05):
+    """Download ``path`` over and over, ``chunk_size`` bytes per ``interval``."""
+    parts = urlsplit(base_url)
+    request = f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\nConnection: close\r\n\r\n'
+    while not stop.is_set():
+        sock = socket.socket()
+        # A small receive window, so the server cannot hand the response off to the kernel at once
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, chunk_size)
+        try:
+            sock.connect((parts.hostname, parts.port or 80))
+            sock.sendall(request.encode())
+            while not stop.is_set():
+                if not sock.recv(chunk_size):
+                    completed.append(1)
+                    break
+                time.sleep(interval)
+        except OSError:
+            stop.wait(interval)
+        finally:
+            sock.close()
+
+
+def run(base_url, prefix, concurrency, slow_clients, duration, catalog, token, warmup=2.0):
+    """Run the mix against ``base_url`` with ``prefix`` before every path."""
+    recorder = Recorder()
+    stop = threading.Event()
+    slow_completed = []
+
+    def worker():
+        client = Client(base_url, recorder, token)
+        while not stop.is_set():
+            slug = random.choice(catalog.courses)
+            client.request('GET', f'{prefix}/course/', name='/course/')
+            client.request('GET', f'{prefix}/course/{slug}/', name='/course/<slug>/')
+            if catalog.categories:
+                category = random.choice(catalog.categories)
+                client.request('GET', f'{prefix}/category/{category}/', name='/category/<slug>/')
+            if catalog.quizzes:
+                slug, quiz_id, answers = random.choice(catalog.quizzes)
+                client.request(
+                    'POST', f'{prefix}/course/{slug}/submit-quiz', {'quiz': quiz_id, 'answers': answers},
+                    name='/course/<slug>/submit-quiz'
+                )
+        client.close()
+
+    # The largest course keeps slow clients busy the longest
+    slow_path = f'{prefix}/course/{catalog.courses[0]}/'
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    threads += [
+        threading.Thread(target=slow_client, args=(base_url, slow_path, stop, slow_completed), daemon=True)
+        for _ in range(slow_clients)
+    ]
+    recorder.recording = False
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    recorder.recording = True
+    start = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+    results = recorder.results(elapsed)
+    results['slow_downloads'] = len(slow_completed)
+    return results
+
+
+def largest_course(base_url, catalog, token):
+    client = Client(base_url, Recorder(), token)
+    sizes = {}
+    for slug in catalog.courses:
+        status, course = client.request('GET', f'/course/{slug}/')
+        sizes[slug] = len((course or {}).get('content') or '')
+    client.close()
+    return max(sizes, key=sizes.get)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--async-url', help='defaults to --sync-url')
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--slow-clients', type=int, default=0)
+    parser.add_argument('--duration', type=float, default=20, help='seconds to measure each kind of view')
+    parser.add_argument('--email', default='user@example.com')
+    parser.add_argument('--password', default='string')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+    async_url = args.async_url or args.sync_url
+
+    random.seed(args.seed)
+    token = get_token(args.sync_url, args.email, args.password)
+    catalog = Catalog(Client(args.sync_url, Recorder(), token))
+    slowest = largest_course(args.sync_url, catalog, token)
+    catalog.courses.remove(slowest)
+    catalog.courses.insert(0, slowest)
+
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    results = {}
+    for name, url, prefix in (('sync', args.sync_url, ''), ('async', async_url, '/async')):
+        results[name] = run(url, prefix, args.concurrency, args.slow_clients, args.duration, catalog, token)
+        print(f'{name} views at {url}{prefix}/, slow downloads completed: {results[name]["slow_downloads"]}')
+        print_results(results[name])
+        print()
+    results['meta'] = {
+        'sync_url': args.sync_url,
+        'async_url': async_url,
+        'concurrency': args.concurrency,
+        'slow_clients': args.slow_clients,
+        'duration': args.duration,
+        'revision': git_revision(),
+        'started_at': started_at,
+    }
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
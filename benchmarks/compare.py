@@ -0,0 +1,51 @@
+"""
+Compare two result files written by the load test or by the serializer
+benchmarks, e.g.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+
+METRICS = ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')
+SERIALIZER_METRICS = ('ns_per_object', 'allocated_blocks', 'queries')
+
+
+def change(before, after):
+    if not before or after is None:
+        return ''
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def rows(results):
+    """``(name, stats)`` pairs of a load test or a serializer benchmark run."""
+    if 'benchmarks' in results:
+        return dict(results['benchmarks'])
+    return {**results['endpoints'], 'TOTAL': results['total']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    metrics = SERIALIZER_METRICS if 'benchmarks' in after else METRICS
+    before, after = rows(before), rows(after)
+    print(f"{'name':<40} " + ' '.join(f'{metric:>24}' for metric in metrics))
+    for name in {**before, **after}:
+        old, new = before.get(name, {}), after.get(name, {})
+        cells = []
+        for metric in metrics:
+            a, b = old.get(metric), new.get(metric)
+            cells.append(f"{a if a is not None else '-':>8} -> {b if b is not None else '-':>8} {change(a, b):>4}")
+        print(f'{name:<40} ' + ' '.join(f'{cell:>24}' for cell in cells))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+HTTP load test for the API.
+
+Runs a weighted mix of user scenarios against a running server with a number
+of concurrent clients and reports throughput and p50/p95/p99 latency per
+endpoint. Results are saved as JSON so runs before and after a change can be
+compared with ``benchmarks/compare.py``.
+
+    python manage.py runserver 8000
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 16 --duration 30 \\
+        --email user@example.com --password string --output before.json
+
+Scenarios: browse (categories), course (open a course), enroll, submit (submit
+a quiz) and my_courses. Pick a mix with e.g. ``--mix browse=5,course=3,submit=1``.
+With ``--register`` every client registers its own user instead of logging in
+with ``--email``/``--password``.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+DEFAULT_MIX = {'browse': 4, 'course': 4, 'enroll': 1, 'submit': 2, 'my_courses': 1}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Stats for one endpoint; latencies are in seconds."""
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': ms(statistics.fmean(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1]) if latencies else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+class Client:
+    """A keep-alive HTTP client that records the latency of every request."""
+
+    def __init__(self, base_url, recorder, token=None):
+        parts = urlsplit(base_url)
+        self.host = parts.netloc
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = None
+        self.recorder = recorder
+        self.token = token
+
+    def request(self, method, path, body=None, name=None):
+        """Return ``(status, parsed json or None)``; ``name`` groups the stats (defaults to ``path``)."""
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = json.dumps(body) if body is not None else None
+        name = f'{method} {name or path}'
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, timeout=60)
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.close()
+            self.recorder.record(name, time.perf_counter() - start, error=True)
+            return None, None
+        self.recorder.record(name, time.perf_counter() - start, error=status >= 400)
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = True
+
+    def record(self, name, latency, error=False):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies[name].append(latency)
+            if error:
+                self.errors[name] += 1
+
+    def results(self, elapsed):
+        endpoints = {
+            name: summarize(self.latencies[name], self.errors[name], elapsed)
+            for name in sorted(self.latencies)
+        }
+        all_latencies = [latency for values in self.latencies.values() for latency in values]
+        return {'total': summarize(all_latencies, sum(self.errors.values()), elapsed), 'endpoints': endpoints}
+
+
+class Catalog:
+    """Slugs and quizzes discovered from the API before the run starts."""
+
+    def __init__(self, client):
+        status, categories = client.request('GET', '/category/')
+        self.categories = [category['slug'] for category in categories or []]
+        status, page = client.request('GET', '/course/?pagination=cursor&page_size=100')
+        self.courses = [course['slug'] for course in (page or {}).get('results', [])]
+        self.quizzes = []
+        for slug in self.courses:
+            status, course = client.request('GET', f'/course/{slug}/')
+            for quiz in (course or {}).get('quizzes', []):
+                answers = [
+                    {'question': question['id'], 'option': random.choice(question['options'])['id']}
+                    for question in quiz['questions'] if question['options']
+                ] + [
+                    {'question': question['id'], 'option': random.choice(question['options'])['id'],
+                     'question_type': 'fill_blank'}
+                    for question in quiz['fill_blank_questions'] if question['options']
+                ]
+                self.quizzes.append((slug, quiz['id'], answers))
+        if not self.courses:
+            raise SystemExit('No courses found, the load test needs some data.')
+
+
+class Scenarios:
+    """Each scenario is one user action, which may take several requests."""
+
+    def __init__(self, client, catalog):
+        self.client = client
+        self.catalog = catalog
+
+    def browse(self):
+        self.client.request('GET', '/category/')
+        if self.catalog.categories:
+            slug = random.choice(self.catalog.categories)
+            self.client.request('GET', f'/category/{slug}/', name='/category/<slug>/')
+
+    def course(self):
+        self.client.request('GET', '/course/')
+        slug = random.choice(self.catalog.courses)
+        self.client.request('GET', f'/course/{slug}/', name='/course/<slug>/')
+
+    def enroll(self):
+        slug = random.choice(self.catalog.courses)
+        self.client.request('POST', f'/enroll/{slug}/', name='/enroll/<slug>/')
+
+    def submit(self):
+        if not self.catalog.quizzes:
+            return self.course()
+        slug, quiz_id, answers = random.choice(self.catalog.quizzes)
+        self.client.request(
+            'POST', f'/course/{slug}/submit-quiz', {'quiz': quiz_id, 'answers': answers},
+            name='/course/<slug>/submit-quiz'
+        )
+
+    def my_courses(self):
+        self.client.request('GET', '/user/')
+
+
+def get_token(base_url, email, password, register=False):
+    client = Client(base_url, Recorder())
+    if register:
+        client.request('POST', '/register/', {'email': email, 'password': password})
+    status, data = client.request('POST', '/login/', {'email': email, 'password': password})
+    client.close()
+    if status != 200:
+        raise SystemExit(f'Login as {email} failed ({status}): {data}')
+    return data['token']
+
+
+def run(base_url, concurrency, duration, mix, tokens, warmup=0.0):
+    """Run the scenario mix and return the results dict."""
+    recorder = Recorder()
+    catalog = Catalog(Client(base_url, Recorder(), tokens[0]))
+    names, weights = zip(*mix.items())
+    stop = threading.Event()
+
+    def worker(index):
+        client = Client(base_url, recorder, tokens[index % len(tokens)])
+        scenarios = Scenarios(client, catalog)
+        while not stop.is_set():
+            getattr(scenarios, random.choices(names, weights)[0])()
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    recorder.recording = not warmup
+    for thread in threads:
+        thread.start()
+    if warmup:
+        time.sleep(warmup)
+        recorder.recording = True
+    start = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder.results(time.perf_counter() - start)
+
+
+def print_results(results):
+    print(f"{'endpoint':<40} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = [*results['endpoints'].items(), ('TOTAL', results['total'])]
+    for name, stats in rows:
+        print(f"{name:<40} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput'] or 0:>8} "
+              f"{stats['p50_ms'] or 0:>8} {stats['p95_ms'] or 0:>8} {stats['p99_ms'] or 0:>8}")
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if not hasattr(Scenarios, name):
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='seconds to measure')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds to run before measuring')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--email', default='user@example.com')
+    parser.add_argument('--password', default='string')
+    parser.add_argument('--register', action='store_true', help='register one user per client')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.register:
+        run_id = uuid.uuid4().hex[:8]
+        tokens = [
+            get_token(args.url, f'bench-{run_id}-{index}@example.com', args.password, register=True)
+            for index in range(args.concurrency)
+        ]
+    else:
+        tokens = [get_token(args.url, args.email, args.password)]
+
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    results = run(args.url, args.concurrency, args.duration, args.mix, tokens, args.warmup)
+    results['meta'] = {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'mix': args.mix,
+        'revision': git_revision(),
+        'started_at': started_at,
+    }
+    print_results(results)
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
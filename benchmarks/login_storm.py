@@ -0,0 +1,86 @@
+"""
+Login storm: many clients logging in at once, as at the start of a class.
+
+Every client posts to /login/ in a loop. Besides the latency of successful
+logins, the count of fast rejections (503 while password hashing is
+saturated, after which a client waits as told by Retry-After) and of other
+failures is reported, and the latency of a
+lightweight endpoint requested meanwhile shows whether the server stays
+responsive.
+
+    python -m benchmarks.login_storm --url http://127.0.0.1:8000 --concurrency 64 --duration 20 \\
+        --email user@example.com --password string --output storm.json
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+
+from benchmarks.load_test import Client, Recorder, git_revision, print_results, save_results
+
+
+def run(base_url, concurrency, duration, email, password, retry_after=1.0, probe_interval=0.1):
+    recorder = Recorder()
+    statuses = Counter()
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def login_worker():
+        client = Client(base_url, recorder)
+        while not stop.is_set():
+            status, _ = client.request('POST', '/login/', {'email': email, 'password': password})
+            with lock:
+                statuses[status] += 1
+            if status == 503:
+                # Like a client honouring Retry-After
+                stop.wait(retry_after)
+        client.close()
+
+    def probe_worker():
+        # A cheap endpoint, to see how the rest of the API fares meanwhile
+        client = Client(base_url, recorder)
+        while not stop.is_set():
+            client.request('GET', '/category/')
+            time.sleep(probe_interval)
+        client.close()
+
+    threads = [threading.Thread(target=login_worker, daemon=True) for _ in range(concurrency)]
+    threads.append(threading.Thread(target=probe_worker, daemon=True))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results = recorder.results(time.perf_counter() - start)
+    results['statuses'] = {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--email', default='user@example.com')
+    parser.add_argument('--password', default='string')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.url, args.concurrency, args.duration, args.email, args.password)
+    results['meta'] = {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'revision': git_revision(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    print_results(results)
+    print('login statuses:', ', '.join(f'{status}: {count}' for status, count in results['statuses'].items()))
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Microbenchmarks for the course/quiz serializers, no server needed.
+
+Every benchmark runs against fixed-size fixtures in a throwaway in-memory
+database: the quiz tree with 1/10/100 quizzes of 10/100 questions each (half
+multiple choice, half fill-in-blank), and the course lists with 1/10/100
+courses. Each benchmark reports:
+
+- ns per object: median time of one run divided by the number of objects it
+  serializes (questions for the quiz tree, courses for the course lists,
+  answers for quiz grading),
+- allocations: memory blocks allocated and peak KiB during one run (tracemalloc),
+- queries: database queries of one run. Instances are fetched the way the
+  views fetch them before timing starts, so any query here is a lazy lookup
+  inside the serializer.
+
+    python -m benchmarks.serializers
+    python -m benchmarks.serializers --only course_detail --repeat 20 --output after.json
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import django
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+QUIZZES = (1, 10, 100)
+QUESTIONS = (10, 100)
+COURSES = (1, 10, 100)
+OPTIONS_PER_QUESTION = 4
+
+QUIZ_SIZES = [(quizzes, questions) for quizzes in QUIZZES for questions in QUESTIONS]
+COURSE_SIZES = [(courses,) for courses in COURSES]
+
+
+def setup_django():
+    from django.conf import settings
+
+    # Keep content versions in memory instead of the shared Redis cache
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'},
+        'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks-versions'},
+        'sticky': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks-sticky'},
+    }
+    django.setup()
+
+    from django.db import connection
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+class Fixtures:
+    """
+    A course per quiz tree size in the ``quizzes`` category, and
+    ``max(COURSES)`` small courses in the ``catalog`` category.
+    """
+
+    def __init__(self):
+        from main.models import User, Category
+
+        self.user = User.objects.create_user(email='bench@example.com', password='string')
+        self.quizzes = Category.objects.create(name='Quizzes', slug='quizzes')
+        self.catalog = Category.objects.create(name='Catalog', slug='catalog')
+        self.courses = {
+            (quizzes, questions): self.create_course(self.quizzes, f'{quizzes} x {questions}', quizzes, questions)
+            for quizzes, questions in QUIZ_SIZES
+        }
+        self.catalog_courses = [
+            self.create_course(self.catalog, f'Catalog {i}', 1, QUESTIONS[0]) for i in range(max(COURSES))
+        ]
+
+    def create_course(self, category, title, quizzes, questions):
+        from django.utils.text import slugify
+        from main.models import Course, Quiz, Question, Option, FillInBlankQuestion, FillInBlankOption, QuizResult
+
+        course = Course.objects.create(
+            title=title, slug=slugify(title), category=category,
+            description='Description', content='<p>Content</p>' * 20,
+        )
+        quiz_objs = Quiz.objects.bulk_create(
+            Quiz(course=course, title=f'Quiz {i}', description='Description') for i in range(quizzes)
+        )
+        multiple_choice = questions // 2
+        question_objs = Question.objects.bulk_create(
+            Question(quiz=quiz, text=f'Question {i}?') for quiz in quiz_objs for i in range(multiple_choice)
+        )
+        Option.objects.bulk_create(
+            Option(question=question, text=f'Option {i}', is_correct=i == 0)
+            for question in question_objs for i in range(OPTIONS_PER_QUESTION)
+        )
+        fill_blank_objs = FillInBlankQuestion.objects.bulk_create(
+            FillInBlankQuestion(quiz=quiz, text_before='I like', text_after='of them.', correct_answer='both')
+            for quiz in quiz_objs for _ in range(questions - multiple_choice)
+        )
+        FillInBlankOption.objects.bulk_create(
+            FillInBlankOption(question=question, text=text)
+            for question in fill_blank_objs for text in ('both', 'either', 'neither', 'none')
+        )
+        # The user has completed every other quiz
+        QuizResult.objects.bulk_create(
+            QuizResult(user=self.user, quiz=quiz, score=50, correct_answers=questions // 2) for quiz in quiz_objs[::2]
+        )
+        return course
+
+    def request(self, path='/', authenticated=True):
+        from django.contrib.auth.models import AnonymousUser
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        request = Request(APIRequestFactory().get(path))
+        request.user = self.user if authenticated else AnonymousUser()
+        return request
+
+
+class Benchmarks:
+    """
+    Each ``bench_*`` method takes one of the fixture sizes listed in
+    ``SIZES`` and returns ``(run, objects)``: a callable doing one
+    serialization and the number of objects it handles.
+    """
+
+    SIZES = {
+        'course_detail': QUIZ_SIZES,
+        'quiz': QUIZ_SIZES,
+        'quiz_result': QUIZ_SIZES,
+        'course_list': COURSE_SIZES,
+        'category_detail': COURSE_SIZES,
+    }
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+
+    def bench_course_detail(self, quizzes, questions):
+        from main.serializers import CourseDetailSerializer
+        from main.views import CourseDetailView
+
+        course = CourseDetailView.queryset.get(pk=self.fixtures.courses[quizzes, questions].pk)
+        # The view caches this public representation and merges in the user's results
+        context = {'request': self.fixtures.request(), 'public': True}
+        return lambda: CourseDetailSerializer(course, context=context).data, quizzes * questions
+
+    def bench_quiz(self, quizzes, questions):
+        from main.models import Quiz
+        from main.serializers import QuizSerializer
+
+        course = self.fixtures.courses[quizzes, questions]
+        quiz_objs = list(Quiz.objects.filter(course=course).prefetch_related(
+            'questions__options', 'fill_blank_questions__options',
+        ))
+        # Public, like inside the cached course detail
+        context = {'request': self.fixtures.request(), 'public': True}
+        return lambda: QuizSerializer(quiz_objs, many=True, context=context).data, quizzes * questions
+
+    def bench_course_list(self, courses):
+        from main.models import Course
+        from main.serializers import CourseSerializer
+
+        # Fetched like CourseView does
+        course_objs = list(CourseSerializer.setup_eager_loading(
+            Course.objects.filter(category=self.fixtures.catalog).order_by('id')
+        )[:courses])
+        context = {'request': self.fixtures.request()}
+        return lambda: CourseSerializer(course_objs, many=True, context=context).data, courses
+
+    def bench_category_detail(self, courses):
+        from main.serializers import CategoryDetailSerializer
+
+        # Paginated like the view does, so the page queries are not free
+        category = self.fixtures.catalog
+        request = self.fixtures.request(f'/category/catalog/?page_size={courses}')
+
+        def run():
+            context = {'request': request, 'course_page': CategoryDetailSerializer.paginate_courses(category, request)}
+            return CategoryDetailSerializer(category, context=context).data
+        return run, courses
+
+    def bench_quiz_result(self, quizzes, questions):
+        from django.db import transaction
+        from main.models import Quiz
+        from main.serializers import QuizResultProcessSerializer
+
+        # Grades the answers of the first quiz of the course; the result row
+        # is rolled back so every run inserts into the same table.
+        quiz = Quiz.objects.filter(course=self.fixtures.courses[quizzes, questions]).order_by('pk').first()
+        answers = [
+            {'question': question.pk, 'option': question.options.all()[0].pk}
+            for question in quiz.questions.prefetch_related('options')
+        ] + [
+            {'question': question.pk, 'option': question.options.all()[0].pk, 'question_type': 'fill_blank'}
+            for question in quiz.fill_blank_questions.prefetch_related('options')
+        ]
+        data = {'quiz': quiz.pk, 'answers': answers}
+        context = {'request': self.fixtures.request()}
+
+        def run():
+            with transaction.atomic():
+                serializer = QuizResultProcessSerializer(data=data, context=context)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                transaction.set_rollback(True)
+        return run, len(answers)
+
+    @classmethod
+    def names(cls):
+        return list(cls.SIZES)
+
+
+def measure(run, objects, repeat):
+    """Time, allocations and queries of ``run``; the first call is a warm-up."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    run()
+
+    with CaptureQueriesContext(connection) as queries:
+        run()
+
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    run()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        run()
+        timings.append(time.perf_counter_ns() - start)
+    median = statistics.median(timings)
+
+    return {
+        'objects': objects,
+        'ns_per_object': round(median / objects),
+        'median_ms': round(median / 1e6, 3),
+        'min_ms': round(min(timings) / 1e6, 3),
+        'allocated_blocks': blocks,
+        'peak_kib': round(peak / 1024, 1),
+        'queries': len(queries),
+    }
+
+
+def print_results(results):
+    print(f"{'benchmark':<32} {'objects':>8} {'ns/object':>10} {'median ms':>10} "
+          f"{'blocks':>8} {'peak KiB':>9} {'queries':>8}")
+    for name, stats in results['benchmarks'].items():
+        print(f"{name:<32} {stats['objects']:>8} {stats['ns_per_object']:>10} {stats['median_ms']:>10} "
+              f"{stats['allocated_blocks']:>8} {stats['peak_kib']:>9} {stats['queries']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', action='append', choices=Benchmarks.names(),
+                        help='run only this benchmark (can be repeated)')
+    parser.add_argument('--repeat', type=int, default=10, help='timed runs per benchmark')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup_django()
+    from benchmarks.load_test import git_revision, save_results
+
+    benchmarks = Benchmarks(Fixtures())
+    results = {'benchmarks': {}}
+    for name in args.only or Benchmarks.names():
+        for size in Benchmarks.SIZES[name]:
+            run, objects = getattr(benchmarks, f'bench_{name}')(*size)
+            key = f"{name}[{'x'.join(map(str, size))}]"
+            results['benchmarks'][key] = measure(run, objects, args.repeat)
+
+    results['meta'] = {
+        'repeat': args.repeat,
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'django': django.get_version(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    print_results(results)
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Concurrent reads and writes against SQLite with the default connection
+settings and with the production profile (config/settings_production.py,
+with SERIALIZE_DB_WRITES=1).
+
+Reader threads load a course with its quizzes the way CourseDetailView does.
+Writer threads do what quiz submissions and enrollments do: read, then
+insert in one transaction. With the default profile writers use a plain
+(deferred) transaction; with the production profile they go through
+``serialized_write``. The ``unserialized`` profile has the production
+connection settings without ``serialized_write``. Each profile gets its own
+fresh database file.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 8 --duration 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import django
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+PROFILES = ('default', 'production', 'unserialized')
+
+
+def setup_django(directory):
+    from django.conf import settings
+    from config import settings_production
+
+    settings.DATABASES = {
+        profile: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory, f'{profile}.sqlite3'),
+            'OPTIONS': settings_production.DATABASES['default']['OPTIONS'] if profile != 'default' else {},
+        }
+        for profile in PROFILES
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'},
+        'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks-versions'},
+        'sticky': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks-sticky'},
+    }
+    settings.SERIALIZE_DB_WRITES = True
+    django.setup()
+
+    # The signal receivers in main.signals look rows up in the default database
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_data(using, courses, users):
+    """Migrate the database and add courses with a quiz each, and users."""
+    from django.core.management import call_command
+    from main.models import User, Category, Course, Quiz, Question, Option
+
+    if using != 'default':
+        call_command('migrate', database=using, verbosity=0)
+    category = Category.objects.using(using).create(name='Benchmarks', slug='benchmarks')
+    course_objs = Course.objects.using(using).bulk_create(
+        Course(title=f'Course {i}', slug=f'course-{i}', category=category, content='<p>Content</p>' * 50)
+        for i in range(courses)
+    )
+    quizzes = Quiz.objects.using(using).bulk_create(Quiz(course=course, title='Quiz') for course in course_objs)
+    questions = Question.objects.using(using).bulk_create(
+        Question(quiz=quiz, text=f'Question {i}?') for quiz in quizzes for i in range(10)
+    )
+    Option.objects.using(using).bulk_create(
+        Option(question=question, text=f'Option {i}', is_correct=i == 0) for question in questions for i in range(4)
+    )
+    user_objs = User.objects.using(using).bulk_create(
+        User(email=f'user{i}@example.com', username=f'user{i}@example.com') for i in range(users)
+    )
+    return [course.slug for course in course_objs], [user.pk for user in user_objs]
+
+
+class Workload:
+    def __init__(self, using, slugs, user_ids):
+        self.using = using
+        self.slugs = slugs
+        self.user_ids = user_ids
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, start, error=False):
+        with self.lock:
+            self.latencies[name].append(time.perf_counter() - start)
+            if error:
+                self.errors[name] += 1
+
+    def write_block(self):
+        from django.db import transaction
+        from main.helpers import serialized_write
+
+        if self.using == 'production':
+            return serialized_write(using=self.using)
+        return transaction.atomic(using=self.using)
+
+    def read(self):
+        from main.views import CourseDetailView
+
+        course = CourseDetailView.queryset.using(self.using).get(slug=random.choice(self.slugs))
+        for quiz in course.quizzes.all():
+            for question in quiz.questions.all():
+                list(question.options.all())
+
+    def submit(self):
+        from main.models import Question, QuizResult
+
+        with self.write_block():
+            quiz_id = Question.objects.using(self.using).order_by('?').values_list('quiz_id', flat=True)[0]
+            QuizResult.objects.using(self.using).create(
+                user_id=random.choice(self.user_ids), quiz_id=quiz_id, score=50, correct_answers=5
+            )
+
+    def enroll(self):
+        from main.models import Course, Enrollment
+
+        with self.write_block():
+            course = Course.objects.using(self.using).get(slug=random.choice(self.slugs))
+            Enrollment.objects.using(self.using).get_or_create(user_id=random.choice(self.user_ids), course=course)
+
+    def worker(self, actions, stop):
+        from django.db import OperationalError, connections
+
+        while not stop.is_set():
+            action = random.choice(actions)
+            start = time.perf_counter()
+            try:
+                getattr(self, action)()
+            except OperationalError:
+                # "database is locked"
+                self.record(action, start, error=True)
+            else:
+                self.record(action, start)
+        connections.close_all()
+
+    def run(self, readers, writers, duration):
+        from benchmarks.load_test import summarize
+
+        stop = threading.Event()
+        threads = [threading.Thread(target=self.worker, args=(['read'], stop)) for _ in range(readers)]
+        threads += [threading.Thread(target=self.worker, args=(['submit', 'enroll'], stop)) for _ in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return {name: summarize(self.latencies[name], self.errors[name], elapsed) for name in sorted(self.latencies)}
+
+
+def print_results(results):
+    print(f"{'profile':<12} {'action':<8} {'ops':>7} {'errors':>7} {'ops/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for profile, actions in results['profiles'].items():
+        for name, stats in actions.items():
+            print(f"{profile:<12} {name:<8} {stats['requests']:>7} {stats['errors']:>7} {stats['throughput'] or 0:>8} "
+                  f"{stats['p50_ms'] or 0:>8} {stats['p95_ms'] or 0:>8} {stats['p99_ms'] or 0:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per profile')
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--profile', action='append', choices=PROFILES, help='run only this profile')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(directory)
+        from benchmarks.load_test import git_revision, save_results
+
+        results = {'profiles': {}}
+        for profile in args.profile or PROFILES:
+            print(f'Running {profile}...', file=sys.stderr)
+            slugs, user_ids = create_data(profile, args.courses, args.users)
+            results['profiles'][profile] = Workload(profile, slugs, user_ids).run(
+                args.readers, args.writers, args.duration
+            )
+
+    results['meta'] = {
+        'readers': args.readers,
+        'writers': args.writers,
+        'duration': args.duration,
+        'revision': git_revision(),
+    }
+    print_results(results)
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
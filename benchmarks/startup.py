@@ -0,0 +1,128 @@
+"""
+Startup time and first request latency of the gunicorn entry point.
+
+Starts gunicorn (gunicorn.conf.py) once per configuration and run, and
+measures the time until ``/ready/`` answers 200, then the latency of the
+first request to each path and the median of the following ones:
+
+- cold: no preloading, no warm-up (GUNICORN_PRELOAD=0 WARM_UP=0)
+- warm: the app preloaded and warmed up in the master (the default)
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+
+Run it against a database with data (see the generate_data command), with
+DJANGO_SETTINGS_MODULE set as in production.
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.load_test import git_revision, save_results
+
+
+CONFIGS = {
+    'cold': {'GUNICORN_PRELOAD': '0', 'WARM_UP': '0'},
+    'warm': {'GUNICORN_PRELOAD': '1', 'WARM_UP': '1'},
+}
+
+DEFAULT_PATHS = ['/category/', '/course/', '/swagger/?format=openapi']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(url):
+    """Return ``(status, seconds)`` of a GET request, status None if the server is not up."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, ConnectionError):
+        status = None
+    return status, time.perf_counter() - start
+
+
+def start_once(config, paths, workers, repeat, timeout=120):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = {**os.environ, **CONFIGS[config], 'GUNICORN_BIND': f'127.0.0.1:{port}', 'GUNICORN_WORKERS': str(workers)}
+    start = time.perf_counter()
+    process = subprocess.Popen(['gunicorn'], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while get(f'{base_url}/ready/')[0] != 200:
+            if process.poll() is not None or time.perf_counter() - start > timeout:
+                raise SystemExit(f'gunicorn ({config}) did not get ready, exit code {process.poll()}')
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+
+        first = {path: get(base_url + path)[1] for path in paths}
+        steady = {path: statistics.median(get(base_url + path)[1] for _ in range(repeat)) for path in paths}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+    return {'ready': ready, 'first': first, 'steady': steady}
+
+
+def run(paths, workers, runs, repeat):
+    results = {}
+    for config in CONFIGS:
+        samples = [start_once(config, paths, workers, repeat) for _ in range(runs)]
+        ms = lambda values: round(statistics.median(values) * 1000, 2)
+        results[config] = {
+            'ready_ms': ms(sample['ready'] for sample in samples),
+            'paths': {
+                path: {
+                    'first_ms': ms(sample['first'][path] for sample in samples),
+                    'steady_ms': ms(sample['steady'][path] for sample in samples),
+                }
+                for path in paths
+            },
+        }
+    return results
+
+
+def print_results(results):
+    for config, stats in results.items():
+        print(f"{config}: ready after {stats['ready_ms']} ms")
+        print(f"  {'path':<40} {'first':>10} {'steady':>10}")
+        for path, path_stats in stats['paths'].items():
+            print(f"  {path:<40} {path_stats['first_ms']:>10} {path_stats['steady_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='with more than one the first requests may each hit another worker')
+    parser.add_argument('--runs', type=int, default=3, help='server starts per configuration, the median is reported')
+    parser.add_argument('--repeat', type=int, default=20, help='requests per path after the first one')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.paths, args.workers, args.runs, args.repeat)
+    print_results(results)
+    if args.output:
+        results['meta'] = {
+            'paths': args.paths,
+            'workers': args.workers,
+            'runs': args.runs,
+            'revision': git_revision(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        save_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,33 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    # Django does not speak the lifespan protocol; warm up (main/warmup.py) at
+    # its startup and finish the queued image variants (main/images.py) at
+    # its shutdown, outside the event loop, and hand everything else to Django
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    from main.images import finish_pending
+    from main.warmup import warm_up
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await sync_to_async(warm_up)()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': repr(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await sync_to_async(finish_pending)()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -78,6 +78,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.RequestTimingMiddleware',
+    'main.middleware.DatabaseRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -120,10 +122,68 @@ DATABASES = {
     }
 }
 
+# Read replicas for the catalog views (see main/routers.py), given as
+# comma-separated SQLite paths, e.g. DATABASE_REPLICAS=/srv/replica.sqlite3.
+# Each one becomes a `replicaN` alias.
+DATABASE_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(','))):
+    DATABASES[f'replica{index + 1}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index + 1}')
+
+DATABASE_ROUTERS = ['main.routers.PrimaryReplicaRouter']
+
+# How long a user who wrote something keeps reading from the primary
+REPLICA_STICKY_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Version tokens (see main/versioning.py) must be shared by all workers,
+    # and are read and set on most requests: Redis does either in O(1) and
+    # never culls keys at random.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+        'TIMEOUT': None,
+    },
+    # Users reading from the primary after a write (see main/routers.py),
+    # kept apart so that clearing the versions keeps them.
+    'sticky': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/2',
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
+AUTHENTICATION_BACKENDS = ['main.backends.PooledModelBackend']
+
+# At most PASSWORD_HASHING_WORKERS passwords are hashed at once per process
+# and PASSWORD_HASHING_QUEUE more may wait, further logins and registrations
+# get a 503 (see main/hashing.py). The CPUs are shared out between the
+# GUNICORN_WORKERS processes (see gunicorn.conf.py). A waiting login holds
+# its request thread, so hashing and waiting logins leave at least one of
+# the GUNICORN_THREADS of a process free for other requests.
+_CPUS = os.cpu_count() or 1
+_GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 2 * _CPUS + 1))
+_GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+PASSWORD_HASHING_WORKERS = max(min(_CPUS // _GUNICORN_WORKERS, _GUNICORN_THREADS - 1), 1)
+PASSWORD_HASHING_QUEUE = max(_GUNICORN_THREADS - 1 - PASSWORD_HASHING_WORKERS, 0)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -161,6 +221,16 @@ STATICFILES_DIRS = [
     BASE_DIR / "assets",
 ]
 
+# Resized WebP copies of course images and TinyMCE uploads (main/images.py):
+# variant name -> width in pixels, made by a pool of background threads per
+# worker process.
+IMAGE_VARIANT_WIDTHS = {'thumbnail': 160, 'card': 480, 'full': 1280}
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_WORKERS = 1
+
+# Written by `manage.py generate_schema`, served at /swagger/?format=openapi
+OPENAPI_SCHEMA_FILE = BASE_DIR / 'static' / 'openapi.json'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -180,7 +250,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'main.authentication.RevocableJWTAuthentication',
     ),
 }
 
@@ -194,6 +264,56 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
 }
 
+# Sizing of the per-worker Bloom filter of revoked tokens (main/revocation.py)
+TOKEN_REVOCATION_CAPACITY = 100000
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+
+
+# Views exceeding their `query_budget` raise instead of logging a warning
+# (see main/middleware.py). Enable in tests.
+QUERY_BUDGET_STRICT = False
+
+# Serialize the writes of a worker process (main.helpers.serialized_write),
+# see config/settings_production.py.
+SERIALIZE_DB_WRITES = False
+
+# Warm caches before serving (main/warmup.py, run from gunicorn.conf.py and
+# config/asgi.py); WARM_UP=0 in the environment skips it.
+WARM_UP = os.environ.get('WARM_UP', '1') != '0'
+# Answer keys compiled by the warm-up, of the most recently submitted quizzes
+WARM_UP_QUIZZES = 200
+# The public URL of the API (e.g. https://api.example.com): when set, the
+# warm-up also caches the detail pages of those quizzes' courses for it
+WARM_UP_URL = os.environ.get('WARM_UP_URL')
+
+# Checked by `manage.py profile_startup`: the time from starting a process to
+# its first response, in ms (None for no limit), and modules that must not be
+# imported on the way, so they stay lazy (see main/schema.py).
+STARTUP_BUDGET_MS = None
+STARTUP_LAZY_MODULES = ['drf_yasg.generators', 'drf_yasg.openapi', 'drf_yasg.views']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'main.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'main.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 TINYMCE_JS_URL = "libs/tinymce/tinymce.min.js"
 
@@ -0,0 +1,53 @@
+"""
+Production settings: the base settings plus a SQLite profile tuned for
+concurrent readers and writers.
+
+Use with DJANGO_SETTINGS_MODULE=config.settings_production.
+"""
+
+import os
+
+from config.settings import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/databases/#sqlite-notes
+#
+# - WAL lets readers run while a write is in progress instead of blocking
+#   behind it; it is stored in the database file, so it sticks once set.
+# - synchronous=NORMAL only syncs at checkpoints, which is safe with WAL (a
+#   power loss can drop the last transactions but not corrupt the file).
+# - mmap_size reads the database through memory mapping instead of read()
+#   calls.
+# - busy_timeout (and `timeout`, the same thing in seconds for Python's
+#   sqlite3) makes a connection wait for a lock instead of failing with
+#   "database is locked".
+# - IMMEDIATE transactions take the write lock at BEGIN. With the default
+#   DEFERRED mode a transaction that reads and then writes has to upgrade
+#   its lock, and SQLite fails that upgrade right away without waiting for
+#   the busy timeout when another writer holds the lock.
+
+DATABASES['default']['OPTIONS'] = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA busy_timeout=20000;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
+# Keep connections open between requests, the PRAGMAs above then only run
+# once per connection.
+DATABASES['default']['CONN_MAX_AGE'] = 600
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# SERIALIZE_DB_WRITES=1 in the environment makes the writes wrapped in
+# main.helpers.serialized_write wait for each other inside the worker process
+# instead of competing for the SQLite write lock: fewer writes per second, but
+# a shorter tail of slow ones (see benchmarks/sqlite_concurrency.py).
+SERIALIZE_DB_WRITES = os.environ.get('SERIALIZE_DB_WRITES', '0') == '1'
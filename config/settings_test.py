@@ -0,0 +1,34 @@
+"""
+Settings for ``manage.py test``, which uses them unless
+DJANGO_SETTINGS_MODULE is set.
+"""
+import tempfile
+
+from config.settings import *  # noqa: F401,F403
+
+
+# A second database for the router tests (main/tests/test_routers.py), which
+# list it in DATABASE_REPLICAS. Unlike a real replica it is not a mirror of
+# the primary, so they can tell which database a read went to.
+DATABASES['replica1'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'replica1.sqlite3',
+}
+
+# Every test starts from empty caches; the version tokens need not be shared
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'versions', 'TIMEOUT': None},
+    'sticky': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sticky'},
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='english-course-media-')
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+WARM_UP = False
+
+# Views going over their query_budget fail the test (see main/middleware.py)
+QUERY_BUDGET_STRICT = True
+
+LOGGING = {**LOGGING, 'loggers': {**LOGGING['loggers'], 'main.timing': {'handlers': [], 'propagate': False}}}
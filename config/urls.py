@@ -1,8 +1,12 @@
+import re
+
 from django.contrib import admin
 from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from main import views
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,5 +14,13 @@ urlpatterns = [
     path('', include('main.urls')),
 ]
 
+if settings.DEBUG:
+    # Content-addressed TinyMCE uploads, with the immutable cache headers the
+    # front server sets in production
+    urlpatterns.append(re_path(
+        r'^%s(?P<path>uploads/tinymce/[0-9a-f]{2}/[0-9a-f]{64}\.\w+)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        views.hashed_upload,
+    ))
+
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+gunicorn settings for serving the API in production:
+
+    DJANGO_SETTINGS_MODULE=config.settings_production gunicorn
+
+The app is loaded and warmed up (main/warmup.py) once in the master process,
+then the workers are forked from it: they share the imported code and start
+with warm caches instead of each paying for both on their first requests.
+Settings can be overridden with the GUNICORN_* environment variables below.
+"""
+import gc
+import os
+
+
+wsgi_app = 'config.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:4200')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+timeout = 30
+graceful_timeout = 30
+# Recycle workers now and then, forked again from the warm master
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded, before any worker is forked
+    if preload_app:
+        from main.warmup import warm_up
+        warm_up()
+        # Keep the garbage collector from touching, and so copying, the
+        # pages of everything loaded so far in every worker
+        gc.freeze()
+
+
+def pre_fork(server, worker):
+    # A connection opened by the master must not be shared by the workers
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # Without preloading every worker loads the app, and warms up, itself
+    if not preload_app:
+        from main.warmup import warm_up
+        warm_up()
+
+
+def worker_exit(server, worker):
+    # Generate the image variants still queued, before they are lost
+    from main.images import finish_pending
+    finish_pending()
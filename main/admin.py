@@ -1,6 +1,9 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.template.response import TemplateResponse
 from main import models
+from main.user_import import import_users, read_rows
 import nested_admin
 
 
@@ -76,4 +79,43 @@ class FillInBlankQuestionAdmin(admin.ModelAdmin):
     list_display = ('id', 'quiz', 'text_before', 'text_after', 'correct_answer', 'created_at')
     list_filter = ('quiz', 'created_at')
     search_fields = ('text_before', 'text_after', 'correct_answer')
-    inlines = [FillInBlankOptionInline]
\ No newline at end of file
+    inlines = [FillInBlankOptionInline]
+
+class ImportUsersForm(forms.Form):
+    file = forms.FileField(help_text='CSV with a header, or JSON Lines (.jsonl), with the keys email, password, '
+                                     'first_name, last_name and group. Rows without a group join this one.')
+
+
+@admin.register(models.Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'description')
+    search_fields = ('name',)
+    actions = ['import_users']
+
+    @admin.action(description='Import users into the selected group', permissions=['import_users'])
+    def import_users(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Select exactly one group to import users into.', messages.ERROR)
+            return None
+        group = queryset.get()
+        form = ImportUsersForm(request.POST, request.FILES) if 'file' in request.FILES else ImportUsersForm()
+        if form.is_valid():
+            report = import_users(read_rows(form.cleaned_data['file']), group)
+            self.message_user(request, f'{group}: {report}.',
+                              messages.SUCCESS if not report.duplicates and not report.errors else messages.WARNING)
+            for line, email, reason in report.duplicates[:20]:
+                self.message_user(request, f'Line {line}: {email} skipped, {reason}.', messages.WARNING)
+            for line, message in report.errors[:20]:
+                self.message_user(request, f'Line {line}: {message}.', messages.ERROR)
+            return None
+        return TemplateResponse(request, 'admin/main/group/import_users.html', {
+            **self.admin_site.each_context(request),
+            'title': f'Import users into {group}',
+            'opts': self.model._meta,
+            'group': group,
+            'form': form,
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    def has_import_users_permission(self, request):
+        return request.user.has_perm('main.add_user')
@@ -0,0 +1,146 @@
+"""
+JWT authentication without a database query.
+
+Access tokens carry the user's id, email and group (``ClaimsAccessToken``).
+``ClaimsJWTAuthentication`` trusts those signed claims and returns a
+``ClaimsUser``, which loads the full ``User`` only when a view touches any
+other attribute. Since the user row is not read, deactivated and deleted
+users are rejected through a per-process deny-set instead, reloaded
+whenever the ``users``/``denied`` version is bumped (see main/signals.py).
+
+Both authentication classes here reject revoked tokens (main/revocation.py).
+
+Filter by ``user_id=request.user.pk`` rather than ``user=request.user`` in
+views using it, a ``ClaimsUser`` is not a model instance.
+"""
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from main.models import DeletedUser, User
+from main.revocation import is_revoked
+from main.versioning import get_version
+
+
+class ClaimsAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['email'] = user.email
+        token['group'] = user.group_id
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from the claims of an access token. ``id``, ``email`` and
+    ``group_id`` come from the token, everything else from the full ``User``
+    (``.user``), which is loaded on first use.
+    """
+
+    def __str__(self):
+        return self.email
+
+    @cached_property
+    def user(self):
+        try:
+            return User.objects.get(pk=self.pk)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    @cached_property
+    def email(self):
+        # Tokens issued before the claims were added do not have them
+        return self.token['email'] if 'email' in self.token else self.user.email
+
+    @cached_property
+    def group_id(self):
+        return self.token['group'] if 'group' in self.token else self.user.group_id
+
+    @property
+    def username(self):
+        return self.user.username
+
+    @property
+    def is_staff(self):
+        return self.user.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None):
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None):
+        return self.user.get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None):
+        return self.user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return self.user.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module):
+        return self.user.has_module_perms(module)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+_denied = {'version': None, 'ids': frozenset()}
+
+
+def denied_user_ids():
+    """Ids of inactive and deleted users, reloaded after a deny-set change."""
+    version = get_version('users', 'denied')
+    if version != _denied['version']:
+        ids = set(User.objects.filter(is_active=False).values_list('pk', flat=True))
+        ids |= set(DeletedUser.objects.filter(expires_at__gt=timezone.now()).values_list('user_id', flat=True))
+        _denied.update(version=version, ids=frozenset(ids))
+    return _denied['ids']
+
+
+def remember_deleted_user(user_id):
+    # Their tokens stay valid until they expire, so remember them that long
+    now = timezone.now()
+    DeletedUser.objects.filter(expires_at__lte=now).delete()
+    DeletedUser.objects.update_or_create(
+        user_id=user_id, defaults={'expires_at': now + settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']},
+    )
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that rejects revoked tokens (see main/revocation.py)."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+
+class ClaimsJWTAuthentication(RevocableJWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = ClaimsUser(validated_token)
+        if user.pk in denied_user_ids():
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
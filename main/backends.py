@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from rest_framework.request import Request
+
+from main.hashing import HashingPoolSaturated, check_password, hash_password
+
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that checks passwords on the hashing pool (main/hashing.py).
+
+    When the pool is saturated, API logins (DRF requests) get its 503.
+    Anywhere else, e.g. the admin login, the attempt fails like a wrong
+    password: ``PermissionDenied`` makes ``authenticate()`` return None.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        try:
+            return self._authenticate(username, password, **kwargs)
+        except HashingPoolSaturated:
+            if isinstance(request, Request):
+                raise
+            raise PermissionDenied
+
+    def _authenticate(self, username, password, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown emails take as long as wrong passwords
+            hash_password(password)
+        else:
+            if check_password(user, password) and self.user_can_authenticate(user):
+                return user
@@ -0,0 +1,100 @@
+"""
+Compiled answer keys used to grade quiz submissions in memory.
+"""
+from django.core.cache import cache
+from django.db.models import BooleanField, CharField, F, Value
+
+from main.models import Question, FillInBlankQuestion
+from main.versioning import get_versions
+
+
+MULTIPLE_CHOICE = 'multiple_choice'
+FILL_BLANK = 'fill_blank'
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+_COLUMNS = ('kind', 'quiz_pk', 'question_pk', 'option_pk', 'is_correct', 'option_text', 'correct_text')
+
+
+class AnswerKey:
+    """
+    Everything needed to grade one quiz: for each question type a mapping of
+    ``question id -> {option id: is correct}``.
+    """
+
+    def __init__(self, quiz_id):
+        self.quiz_id = quiz_id
+        self.questions = {MULTIPLE_CHOICE: {}, FILL_BLANK: {}}
+        # Correct text of every fill-in-blank question, kept for reference.
+        self.fill_blank_answers = {}
+
+    @property
+    def total_questions(self):
+        return len(self.questions[MULTIPLE_CHOICE]) + len(self.questions[FILL_BLANK])
+
+    def is_correct(self, question_type, question_id, option_id):
+        """
+        Return whether the option is the right answer to the question.
+        Raises ``KeyError`` if the question is not part of this quiz or the
+        option does not belong to the question.
+        """
+        return self.questions[question_type][question_id][option_id]
+
+    @classmethod
+    def compile(cls, quiz_ids):
+        """Build answer keys for ``quiz_ids`` with a single query."""
+        keys = {quiz_id: cls(quiz_id) for quiz_id in quiz_ids}
+        multiple_choice = Question.objects.filter(quiz_id__in=keys).annotate(
+            kind=Value(MULTIPLE_CHOICE),
+            quiz_pk=F('quiz_id'),
+            question_pk=F('id'),
+            option_pk=F('options__id'),
+            is_correct=F('options__is_correct'),
+            option_text=Value(None, output_field=CharField()),
+            correct_text=Value(None, output_field=CharField()),
+        ).values_list(*_COLUMNS)
+        fill_blank = FillInBlankQuestion.objects.filter(quiz_id__in=keys).annotate(
+            kind=Value(FILL_BLANK),
+            quiz_pk=F('quiz_id'),
+            question_pk=F('id'),
+            option_pk=F('options__id'),
+            is_correct=Value(None, output_field=BooleanField()),
+            option_text=F('options__text'),
+            correct_text=F('correct_answer'),
+        ).values_list(*_COLUMNS)
+
+        for kind, quiz_id, question_id, option_id, is_correct, option_text, correct_text in \
+                multiple_choice.union(fill_blank, all=True):
+            key = keys[quiz_id]
+            options = key.questions[kind].setdefault(question_id, {})
+            if kind == FILL_BLANK:
+                key.fill_blank_answers[question_id] = correct_text
+                is_correct = option_text == correct_text
+            if option_id is not None:
+                options[option_id] = bool(is_correct)
+        return keys
+
+
+def _cache_key(quiz_id, version):
+    return f'answer-key:{quiz_id}:{version}'
+
+
+def get_answer_keys(quiz_ids):
+    """Return ``{quiz id: AnswerKey}``, compiling only the keys missing from the cache."""
+    versions = get_versions('quiz', quiz_ids)
+    cache_keys = {_cache_key(quiz_id, version): quiz_id for quiz_id, version in versions.items()}
+    answer_keys = {cache_keys[key]: value for key, value in cache.get_many(cache_keys).items()}
+
+    missing = [quiz_id for quiz_id in versions if quiz_id not in answer_keys]
+    if missing:
+        compiled = AnswerKey.compile(missing)
+        cache.set_many(
+            {_cache_key(quiz_id, versions[quiz_id]): key for quiz_id, key in compiled.items()},
+            ANSWER_KEY_TIMEOUT,
+        )
+        answer_keys.update(compiled)
+    return answer_keys
+
+
+def get_answer_key(quiz_id):
+    return get_answer_keys([quiz_id])[quiz_id]
@@ -0,0 +1,95 @@
+"""
+Password hashing on a bounded pool of threads.
+
+Hashing a password (PBKDF2 by default) takes tens of milliseconds of CPU on
+purpose. Run inline, a burst of logins keeps every request thread busy
+hashing. Here at most ``PASSWORD_HASHING_WORKERS`` hashes run at once and
+``PASSWORD_HASHING_QUEUE`` more may wait; any further login or registration
+is rejected right away with a 503 (``HashingPoolSaturated``) instead of
+queueing up behind them. hashlib releases the GIL while hashing, so the
+threads do run in parallel.
+
+Passwords hashed with an outdated hasher or iteration count are rehashed
+on a successful login, like ``User.check_password`` does.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolSaturated(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins at the moment, please try again.'
+    default_code = 'server_busy'
+    # Sent as the Retry-After header
+    wait = 1
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        # Hashes running or waiting for a worker
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, func, *args):
+        """
+        Run ``func`` on the pool and return its result. The calling (request)
+        thread blocks until then, so up to ``workers + queue_size`` request
+        threads of a process can be waiting here; see PASSWORD_HASHING_QUEUE.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            self.slots.release()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+    # Threads do not survive a fork, so every worker process needs its own pool
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _verify(password, encoded):
+    is_correct, must_update = verify_password(password, encoded)
+    return is_correct, make_password(password) if is_correct and must_update else None
+
+
+def hash_password(password):
+    """``make_password`` on the pool."""
+    return get_pool().run(make_password, password)
+
+
+def set_password(user, password):
+    """``user.set_password`` with the hashing done on the pool."""
+    user.password = hash_password(password) if password is not None else make_password(None)
+    user._password = password
+
+
+def check_password(user, password):
+    """
+    ``user.check_password`` with the hashing done on the pool, including the
+    rehash of a password stored with outdated hasher settings.
+    """
+    is_correct, new_encoded = get_pool().run(_verify, password, user.password)
+    if new_encoded is not None:
+        user.password = new_encoded
+        user._password = None
+        user.save(update_fields=['password'])
+    return is_correct
@@ -1,6 +1,22 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import UserManager
 from django.contrib.auth.hashers import make_password
-from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.permissions import SAFE_METHODS
+from main.hashing import set_password
+from main.routers import use_primary, use_replica
+from main.versioning import get_version
 
 class CustomUserManager(UserManager):
     def _create_user(self, email, password, **extra_fields):
@@ -10,7 +26,8 @@ class CustomUserManager(UserManager):
         # Optionally, set a default username if required
         extra_fields.setdefault('username', email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        # Hashed on the bounded pool, see main/hashing.py
+        set_password(user, password)
         user.save(using=self._db)
         return user
 
@@ -29,4 +46,199 @@ class CustomUserManager(UserManager):
 class StandartPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, with the async ORM."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Count and fetch the page here, paginator.page() only slices
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+
+class StandartCursorPagination(CursorPagination):
+    """
+    Keyset pagination: no COUNT(*) and no OFFSET, so every page costs the
+    same. The ordering must be unique and match an index.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('id',)
+
+
+
+class OptionalCursorPagination(StandartPagination):
+    """
+    Page number pagination unless the client opts in to cursor pagination
+    with ``?pagination=cursor``; the opaque ``next``/``previous`` links keep
+    it in that mode.
+    """
+    pagination_mode_query_param = 'pagination'
+    cursor_pagination_class = StandartCursorPagination
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.pagination_mode_query_param) == 'cursor'
+                or self.cursor_pagination_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            # DRF's cursor pagination has no async counterpart
+            return await sync_to_async(self.cursor_paginator.paginate_queryset)(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.pagination_mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Set to 'cursor' for cursor pagination (no count, constant cost per page).",
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+        ] + [
+            parameter for parameter in self.cursor_pagination_class().get_schema_operation_parameters(view)
+            if parameter['name'] == self.cursor_pagination_class.cursor_query_param
+        ]
+
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET requests with 304 Not Modified before any serializer runs when
+    the client's ``If-None-Match`` still matches.
+
+    The ETag is derived from the content versions (see main/versioning.py)
+    the response depends on, the URL, the renderer and, for authenticated
+    users, their quiz results. Views name the scope of those versions in
+    ``version_scope``: the versions of the ``version_model`` row looked up
+    by ``lookup_field``, or with no ``version_model``, the version ``all``.
+
+    There is no Last-Modified: versions change within the second, which
+    If-Modified-Since cannot tell apart.
+    """
+    version_scope = None
+    version_model = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.version_scope is None:
+            raise ImproperlyConfigured(f'{type(self).__name__} must set version_scope')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_version_keys(self):
+        """
+        Return a list of ``(scope, pk)`` pairs, or None to skip conditional
+        handling (when the object does not exist).
+        """
+        if self.version_model is None:
+            return [(self.version_scope, 'all')]
+        lookup = {self.lookup_field: self.kwargs[self.lookup_field]}
+        pk = self.version_model.objects.filter(**lookup).values_list('pk', flat=True).first()
+        return None if pk is None else [(self.version_scope, pk)]
+
+    def get(self, request, *args, **kwargs):
+        version_keys = self.get_version_keys()
+        if version_keys is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = get_etag(request, version_keys, request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        set_etag(response, etag)
+        return response
+
+
+def get_etag(request, version_keys, renderer_format):
+    """
+    Return the ETag of a response that depends on the content versions
+    ``version_keys`` (see ConditionalGetMixin).
+    """
+    user = request.user
+    if user.is_authenticated:
+        version_keys = [*version_keys, ('results', user.pk)]
+    tokens = [get_version(scope, pk) for scope, pk in version_keys]
+
+    parts = [request.build_absolute_uri(), renderer_format, *tokens]
+    if user.is_authenticated:
+        parts.append(f'user:{user.pk}')
+    # Tokens are nanosecond timestamps of the last change
+    changed_at = max(int(token, 16) for token in tokens)
+    if time.time_ns() - changed_at < settings.REPLICA_STICKY_SECONDS * 10 ** 9:
+        # A replica may not have the change yet, don't send old data with the new ETag
+        use_primary()
+    return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+def set_etag(response, etag):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+    patch_vary_headers(response, ['Authorization'])
+
+
+
+class ReplicaReadsMixin:
+    """
+    Read from a replica database (see main/routers.py) when answering safe
+    requests, unless the user wrote something a moment ago.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user)
+
+
+
+_write_lock = threading.RLock()
+
+
+@contextmanager
+def serialized_write(using=None):
+    """
+    Run a block of writes in a transaction. With ``SERIALIZE_DB_WRITES`` the
+    blocks of one worker process run one at a time, so its threads queue up
+    here instead of all waiting on the SQLite write lock (other processes
+    still wait for it in the busy timeout).
+    """
+    lock = _write_lock if settings.SERIALIZE_DB_WRITES else nullcontext()
+    with lock, transaction.atomic(using=using):
+        yield
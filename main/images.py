@@ -0,0 +1,208 @@
+"""
+Resized WebP variants of course images and TinyMCE uploads.
+
+Both are stored as uploaded, often photos of several MB. Once an upload is
+saved (see main/signals.py), ``generate_variants`` runs on a background
+thread of the worker process: it writes a WebP copy per width of
+``IMAGE_VARIANT_WIDTHS`` next to the original, never wider than it, and
+stores them in the row's ``image_variants``::
+
+    {'source': 'courses/01/02/2025/photo.jpg',
+     'thumbnail': {'name': 'courses/01/02/2025/photo.thumbnail.webp', 'width': 160, 'height': 90},
+     'card': {...}, 'full': {...}}
+
+Until then, and for files Pillow cannot read, it stays empty and clients use
+the original. The variants of a replaced image are deleted. Variants still
+queued when a worker exits are generated first (gunicorn.conf.py,
+config/asgi.py); those lost anyway, e.g. to a killed worker, are generated
+by ``manage.py generate_image_variants`` at each deploy. The API shows the variants as srcset-style maps (``srcset``),
+on courses and on the <img> tags of TinyMCE uploads in course content
+(``add_srcset``).
+
+The rows are updated with QuerySet.update(), which sends no signals, so the
+cached content versions are bumped here.
+"""
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from main.models import Course, TinyMCEImage
+from main.versioning import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    # Threads do not survive a fork, so every worker process needs its own
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def finish_pending():
+    """Wait until the variants queued in this process are generated, e.g. before it exits."""
+    global _executor_pid
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=True)
+            _executor_pid = None
+
+
+def needs_variants(instance):
+    """Whether the variants of ``instance`` are not those of its current image."""
+    return instance.image_variants.get('source') != (instance.image.name or None)
+
+
+def queue_variants(instance):
+    """Generate the variants of ``instance`` in the background once the transaction commits."""
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: get_executor().submit(_generate_in_background, model, pk))
+
+
+def _generate_in_background(model, pk):
+    try:
+        generate_variants(model, pk)
+    except Exception:
+        logger.exception('Generating the image variants of %s %s failed', model.__name__, pk)
+    finally:
+        # The thread lives on, its connection need not
+        connection.close()
+
+
+def render_variants(field_file):
+    """Write the variants of ``field_file`` to its storage and return their ``image_variants`` entry."""
+    storage = field_file.storage
+    with field_file.open('rb') as file, Image.open(file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+
+        root = os.path.splitext(field_file.name)[0]
+        variants = {'source': field_file.name}
+        by_width = {}
+        for variant, width in sorted(settings.IMAGE_VARIANT_WIDTHS.items(), key=lambda item: item[1]):
+            width = min(width, image.width)
+            if width not in by_width:
+                resized = image.copy()
+                resized.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+                content = io.BytesIO()
+                resized.save(content, 'WEBP', quality=settings.IMAGE_VARIANT_QUALITY)
+                name = f'{root}.{variant}.webp'
+                if storage.exists(name):
+                    storage.delete(name)
+                name = storage.save(name, ContentFile(content.getvalue()))
+                by_width[width] = {'name': name, 'width': resized.width, 'height': resized.height}
+            variants[variant] = by_width[width]
+    return variants
+
+
+def generate_variants(model, pk):
+    """
+    Generate the variants of the image of row ``pk`` of ``model`` (Course or
+    TinyMCEImage) and store them. Return whether the row was updated.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return False
+    variants = {}
+    if instance.image:
+        try:
+            variants = render_variants(instance.image)
+        except (OSError, Image.DecompressionBombError) as e:
+            logger.warning('No variants of %s: %s', instance.image.name, e)
+            variants = {'source': instance.image.name}
+
+    # Unless the image has been replaced in the meantime
+    if instance.image:
+        unchanged = Q(image=instance.image.name)
+    else:
+        unchanged = Q(image='') | Q(image__isnull=True)
+    if not model.objects.filter(unchanged, pk=pk).update(image_variants=variants):
+        return False
+    # Those of the image this one replaced
+    delete_variants(instance.image_variants, keep=variants)
+    if model is Course:
+        bump_version('catalog', 'all')
+        bump_version('category', instance.category_id)
+        bump_version('course', pk)
+    elif instance.image:
+        for course_id in Course.objects.filter(content__contains=instance.image.name).values_list('pk', flat=True):
+            bump_version('course', course_id)
+    return True
+
+
+def delete_variants(variants, keep=None):
+    """Delete the files of ``variants`` (an ``image_variants`` value), except those also in ``keep``."""
+    kept = {entry['name'] for variant, entry in (keep or {}).items() if variant != 'source'}
+    for variant, entry in variants.items():
+        if variant != 'source' and entry['name'] not in kept:
+            default_storage.delete(entry['name'])
+
+
+def srcset(variants, request=None):
+    """``image_variants`` as a map of width descriptor to URL, e.g. ``{'160w': url, ...}``."""
+    urls = {}
+    for variant, entry in variants.items():
+        if variant == 'source':
+            continue
+        url = default_storage.url(entry['name'])
+        urls[f"{entry['width']}w"] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+IMG_SRC = re.compile(r'\bsrc\s*=\s*"([^"]*)"', re.IGNORECASE)
+
+
+def _media_name(url):
+    path = unquote(urlsplit(url).path)
+    if path.startswith(settings.MEDIA_URL):
+        return path[len(settings.MEDIA_URL):]
+    return None
+
+
+def add_srcset(html, request=None):
+    """Give the <img> tags of TinyMCE uploads in ``html`` a srcset of their variants."""
+    if not html or '<img' not in html.lower():
+        return html
+    names = set()
+    for tag in IMG_TAG.findall(html):
+        src = IMG_SRC.search(tag)
+        name = src and _media_name(src.group(1))
+        if name:
+            names.add(name)
+    if not names:
+        return html
+    variants = dict(TinyMCEImage.objects.filter(image__in=names).values_list('image', 'image_variants'))
+
+    def replace(match):
+        tag = match.group(0)
+        src = IMG_SRC.search(tag)
+        urls = srcset(variants.get(_media_name(src.group(1)) if src else None) or {}, request)
+        if not urls or re.search(r'\bsrcset\s*=', tag, re.IGNORECASE):
+            return tag
+        value = ', '.join(f'{url} {width}' for width, url in urls.items())
+        end = -2 if tag.endswith('/>') else -1
+        return f'{tag[:end].rstrip()} srcset="{value}"{tag[end:]}'
+
+    return IMG_TAG.sub(replace, html)
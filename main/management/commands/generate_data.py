@@ -0,0 +1,239 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.text import slugify
+from faker import Faker
+
+from main.models import (
+    LEVEL_CHOICES, Group, User, Category, Course, Enrollment, Quiz, Question, Option,
+    FillInBlankQuestion, FillInBlankOption, QuizResult, RevokedToken,
+)
+from main.versioning import VERSION_CACHE
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset for benchmarks. The same --seed always "
+        "produces the same data. Rows are written with chunked bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--courses', type=int, default=2_000)
+        parser.add_argument('--quizzes-per-course', type=int, default=1)
+        parser.add_argument('--questions-per-quiz', type=int, default=10)
+        parser.add_argument('--fill-blank-per-quiz', type=int, default=5)
+        parser.add_argument('--options-per-question', type=int, default=4)
+        parser.add_argument('--enrollments-per-user', type=int, default=5)
+        parser.add_argument('--results', type=int, default=2_000_000, help='total number of quiz results')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--password', default='string', help='password of every generated user')
+        parser.add_argument('--clear', action='store_true',
+                            help='delete groups, categories, courses and non-staff users first; required if the database has any')
+
+    def handle(self, *args, **options):
+        self.fake = Faker()
+        self.fake.seed_instance(options['seed'])
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.seed = options['seed']
+
+        if options['clear']:
+            self.stage('Clearing existing data', self.clear)
+        elif self.has_data():
+            raise CommandError('The database already has groups, courses or users; run with --clear to replace them')
+
+        group_ids = self.stage('Groups', self.create_groups, options['groups'])
+        user_ids = self.stage('Users', self.create_users, options['users'], group_ids, options['password'])
+        category_ids = self.stage('Categories', self.create_categories, options['categories'])
+        course_ids = self.stage('Courses', self.create_courses, options['courses'], category_ids)
+        quiz_ids = self.stage('Quizzes', self.create_quizzes, course_ids, options['quizzes_per_course'])
+        self.stage(
+            'Multiple choice questions', self.create_questions,
+            quiz_ids, options['questions_per_quiz'], options['options_per_question']
+        )
+        self.stage(
+            'Fill-in-blank questions', self.create_fill_blank_questions,
+            quiz_ids, options['fill_blank_per_quiz'], options['options_per_question']
+        )
+        self.stage('Enrollments', self.create_enrollments, user_ids, course_ids, options['enrollments_per_user'])
+        self.stage(
+            'Quiz results', self.create_results,
+            user_ids, quiz_ids, options['questions_per_quiz'] + options['fill_blank_per_quiz'], options['results']
+        )
+
+        # Bulk inserts bypass the signals that bump content versions, so
+        # start over with fresh versions for everything.
+        caches[VERSION_CACHE].clear()
+
+    def stage(self, name, func, *args):
+        start = time.perf_counter()
+        with transaction.atomic():
+            result = func(*args)
+        rows = len(result) if isinstance(result, list) else result
+        count = f' ({rows} rows)' if rows is not None else ''
+        self.stdout.write(f'{name}{count}: {time.perf_counter() - start:.1f}s')
+        return result
+
+    def bulk_create(self, model, objs, return_pks=True):
+        """
+        Insert ``objs`` (any iterable) in chunks. Returns the new primary
+        keys, or only their number with ``return_pks=False``.
+        """
+        pks = []
+        count = 0
+        chunk = []
+        for obj in objs:
+            chunk.append(obj)
+            if len(chunk) >= self.batch_size:
+                created = model.objects.bulk_create(chunk)
+                count += len(created)
+                if return_pks:
+                    pks.extend(obj.pk for obj in created)
+                chunk = []
+        if chunk:
+            created = model.objects.bulk_create(chunk)
+            count += len(created)
+            if return_pks:
+                pks.extend(obj.pk for obj in created)
+        return pks if return_pks else count
+
+    def html(self):
+        paragraphs = [f'<p>{self.fake.paragraph(nb_sentences=5)}</p>' for _ in range(self.random.randint(3, 8))]
+        return f'<h2>{self.fake.sentence()}</h2>' + ''.join(paragraphs)
+
+    def has_data(self):
+        """Whether there is anything ``clear`` would delete."""
+        return (
+            Group.objects.exists() or Category.objects.exists() or Course.objects.exists()
+            or User.objects.filter(is_staff=False, is_superuser=False).exists()
+        )
+
+    def clear(self):
+        # Plain DELETEs: the ORM would load every row to send delete signals
+        with connection.cursor() as cursor:
+            table = lambda model: connection.ops.quote_name(model._meta.db_table)
+            for model in (QuizResult, Enrollment, FillInBlankOption, FillInBlankQuestion, Option, Question,
+                          Quiz, Course, Category):
+                cursor.execute(f'DELETE FROM {table(model)}')
+            users = f'SELECT id FROM {table(User)} WHERE NOT is_staff AND NOT is_superuser'
+            for related in (RevokedToken, User.groups.through, User.user_permissions.through):
+                cursor.execute(f'DELETE FROM {table(related)} WHERE user_id IN ({users})')
+            cursor.execute(f'DELETE FROM {table(User)} WHERE id IN ({users})')
+            User.objects.filter(group__isnull=False).update(group=None)
+            cursor.execute(f'DELETE FROM {table(Group)}')
+
+    def create_groups(self, count):
+        return self.bulk_create(Group, (
+            Group(name=f'{self.fake.word().title()} {i + 1}', description=self.fake.sentence())
+            for i in range(count)
+        ))
+
+    def create_users(self, count, group_ids, password):
+        # Hashing is what makes creating users slow; every user gets the same password
+        password = make_password(password)
+        return self.bulk_create(User, (
+            User(
+                email=f'user{i}.{self.seed}@example.com',
+                username=f'user{i}.{self.seed}@example.com',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+                group_id=self.random.choice(group_ids) if group_ids else None,
+            )
+            for i in range(count)
+        ))
+
+    def create_categories(self, count):
+        categories = []
+        for i in range(count):
+            name = f'{self.fake.word().title()} {i + 1}'
+            categories.append(Category(name=name, slug=f'{slugify(name)}-{self.seed}', description=self.fake.sentence()))
+        return self.bulk_create(Category, categories)
+
+    def create_courses(self, count, category_ids):
+        levels = [level for level, _ in LEVEL_CHOICES]
+
+        def courses():
+            for i in range(count):
+                title = self.fake.catch_phrase()
+                yield Course(
+                    title=title,
+                    slug=f'{slugify(title)[:200]}-{self.seed}-{i}',
+                    category_id=self.random.choice(category_ids),
+                    level=self.random.choice(levels),
+                    description=self.fake.paragraph(),
+                    content=self.html(),
+                )
+        return self.bulk_create(Course, courses())
+
+    def create_quizzes(self, course_ids, per_course):
+        return self.bulk_create(Quiz, (
+            Quiz(course_id=course_id, title=self.fake.sentence(nb_words=4), description=self.fake.sentence())
+            for course_id in course_ids for _ in range(per_course)
+        ))
+
+    def create_questions(self, quiz_ids, per_quiz, options_per_question):
+        question_ids = self.bulk_create(Question, (
+            Question(quiz_id=quiz_id, text=self.fake.sentence()[:-1] + '?')
+            for quiz_id in quiz_ids for _ in range(per_quiz)
+        ))
+
+        def options():
+            for question_id in question_ids:
+                correct = self.random.randrange(options_per_question)
+                for i in range(options_per_question):
+                    yield Option(question_id=question_id, text=self.fake.word(), is_correct=i == correct)
+        self.bulk_create(Option, options())
+        return question_ids
+
+    def create_fill_blank_questions(self, quiz_ids, per_quiz, options_per_question):
+        answers = []
+
+        def questions():
+            for quiz_id in quiz_ids:
+                for _ in range(per_quiz):
+                    words = self.fake.words(nb=options_per_question, unique=True)
+                    answers.append(words)
+                    yield FillInBlankQuestion(
+                        quiz_id=quiz_id,
+                        text_before=self.fake.sentence(nb_words=5)[:-1],
+                        text_after=self.fake.sentence(nb_words=3).lower(),
+                        correct_answer=self.random.choice(words),
+                    )
+        question_ids = self.bulk_create(FillInBlankQuestion, questions())
+        self.bulk_create(FillInBlankOption, (
+            FillInBlankOption(question_id=question_id, text=word)
+            for question_id, words in zip(question_ids, answers) for word in words
+        ))
+        return question_ids
+
+    def create_enrollments(self, user_ids, course_ids, per_user):
+        per_user = min(per_user, len(course_ids))
+        return self.bulk_create(Enrollment, (
+            Enrollment(user_id=user_id, course_id=course_id)
+            for user_id in user_ids for course_id in self.random.sample(course_ids, per_user)
+        ), return_pks=False)
+
+    def create_results(self, user_ids, quiz_ids, questions_per_quiz, count):
+        if not (user_ids and quiz_ids):
+            return 0
+
+        def results():
+            for _ in range(count):
+                # Scored like QuizResultProcessSerializer.grade does
+                correct_answers = self.random.randint(0, questions_per_quiz)
+                yield QuizResult(
+                    user_id=self.random.choice(user_ids),
+                    quiz_id=self.random.choice(quiz_ids),
+                    score=round(correct_answers / questions_per_quiz * 100, 2) if questions_per_quiz else 0,
+                    correct_answers=correct_answers,
+                )
+        return self.bulk_create(QuizResult, results(), return_pks=False)
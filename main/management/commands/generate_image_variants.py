@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.images import generate_variants, needs_variants
+from main.models import Course, TinyMCEImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized WebP variants of course images and TinyMCE "
+        "uploads that do not have them yet, e.g. those uploaded before they "
+        "existed, in this process. --all regenerates every one, e.g. after "
+        "IMAGE_VARIANT_WIDTHS changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='also regenerate the variants that exist')
+
+    def handle(self, *args, **options):
+        for model in (Course, TinyMCEImage):
+            rows = model.objects.only('pk', 'image', 'image_variants').order_by('pk')
+            pks = [row.pk for row in rows.iterator() if (options['all'] and row.image) or needs_variants(row)]
+            start = time.perf_counter()
+            updated = sum(generate_variants(model, pk) for pk in pks)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: updated {updated} of {len(pks)} '
+                f'in {time.perf_counter() - start:.1f}s'
+            )
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema of the API into OPENAPI_SCHEMA_FILE, which "
+        "/swagger/?format=openapi serves. Run it whenever the API changes, e.g. "
+        "when building the image."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='write the schema here instead, "-" for standard output')
+
+    def handle(self, *args, **options):
+        schema = generate_schema()
+        if options['output'] == '-':
+            self.stdout.write(schema.decode())
+            return
+
+        path = Path(options['output'] or settings.OPENAPI_SCHEMA_FILE)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Replace the file at once, a server may be reading it
+            temporary = path.with_name(path.name + '.tmp')
+            temporary.write_bytes(schema)
+            temporary.replace(path)
+        except OSError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f'Wrote the schema ({len(schema)} bytes) to {path}'))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import Group
+from main.user_import import import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV (with a header) or JSON Lines file with the "
+        "keys email, password, first_name, last_name and group. Duplicate "
+        "emails are reported and skipped, the other rows are imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='guessed from the file name by default')
+        parser.add_argument('--group', help='name of the group for rows that do not name one')
+        parser.add_argument('--batch-size', type=int, default=1_000)
+        parser.add_argument('--processes', type=int, help='password hashing processes, the CPU count by default')
+
+    def handle(self, *args, **options):
+        group = None
+        if options['group']:
+            group = Group.objects.filter(name=options['group']).first()
+            if group is None:
+                raise CommandError(f"Group {options['group']!r} does not exist")
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                report = import_users(
+                    read_rows(file, options['format']), group,
+                    batch_size=options['batch_size'], processes=options['processes'],
+                )
+        except OSError as e:
+            raise CommandError(e)
+
+        for line, email, reason in report.duplicates:
+            self.stderr.write(f'line {line}: {email} skipped, {reason}')
+        for line, message in report.errors:
+            self.stderr.write(f'line {line}: {message}')
+        self.stdout.write(f'{report} in {time.perf_counter() - start:.1f}s')
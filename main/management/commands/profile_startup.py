@@ -0,0 +1,64 @@
+import argparse
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.startup import PHASES, profile_startup
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {value}')
+    return number
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a cold start: start fresh processes which set Django up and "
+        "answer one request, report how long each phase took and which "
+        "imports it spent the time on. Fails when the time to the first "
+        "response is over STARTUP_BUDGET_MS or a module of "
+        "STARTUP_LAZY_MODULES was imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/course/', help='the first request')
+        parser.add_argument('--runs', type=positive_int, default=5, help='cold starts to take the median of')
+        parser.add_argument('--top', type=int, default=20, help='how many packages and modules to list')
+        parser.add_argument('--budget', type=float, help='time to the first response in ms, STARTUP_BUDGET_MS by default')
+        parser.add_argument('--output', help='also write the profile to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            profile = profile_startup(options['path'], runs=options['runs'])
+        except RuntimeError as e:
+            raise CommandError(e)
+
+        self.stdout.write(f"Cold start answering GET {profile.path} ({profile.status}), median of {options['runs']}:")
+        for phase in PHASES:
+            self.stdout.write(f"  {phase:<40} {profile.phases[phase]:>10.1f} ms")
+        self.stdout.write(f"  {'total':<40} {profile.total_ms:>10.1f} ms")
+
+        self.stdout.write('\nImport time per package (under -X importtime, which adds its own overhead):')
+        for package, ms in profile.packages()[:options['top']]:
+            self.stdout.write(f"  {package:<40} {ms:>10.1f} ms")
+
+        self.stdout.write('\nSlowest modules to import:')
+        for module, self_ms, cumulative_ms in profile.slowest_imports(options['top']):
+            self.stdout.write(f"  {module:<40} {self_ms:>10.1f} ms  (with its imports {cumulative_ms:.1f} ms)")
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(profile.as_dict(options['top']), file, indent=2)
+
+        errors = []
+        budget = options['budget'] if options['budget'] is not None else settings.STARTUP_BUDGET_MS
+        if budget is not None and profile.total_ms > budget:
+            errors.append(f'The first response took {profile.total_ms:.1f} ms, the budget is {budget:g} ms')
+        imported = profile.lazy_violations(settings.STARTUP_LAZY_MODULES)
+        if imported:
+            errors.append(f"Imported before the first response, but listed in STARTUP_LAZY_MODULES: {', '.join(imported)}")
+        if errors:
+            raise CommandError('\n'.join(errors))
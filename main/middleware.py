@@ -0,0 +1,258 @@
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from main import routers
+
+
+logger = logging.getLogger('main.timing')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Savepoints of atomic blocks nested in a transaction (or, in tests, in the
+# test case's) are timed but not counted as queries
+TRANSACTION_CONTROL = ('SAVEPOINT ', 'RELEASE SAVEPOINT ', 'ROLLBACK TO SAVEPOINT ')
+
+
+class RequestTimings:
+    """Measurements of a single request, filled in by RequestTimingMiddleware."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_class = None
+        self.view_start = None
+        self.render_start = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.db_time_before_render = 0.0
+        self.serializing = False
+        self.serialize_time = 0.0
+        self.serialize_db_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(TRANSACTION_CONTROL):
+                self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def serialization(self):
+        # Serializers nest (and call each other's .data); time the outermost
+        if self.serializing:
+            yield
+            return
+        self.serializing = True
+        start, db_start = time.perf_counter(), self.db_time
+        try:
+            yield
+        finally:
+            self.serializing = False
+            self.serialize_time += time.perf_counter() - start
+            self.serialize_db_time += self.db_time - db_start
+
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    # Installed on every connection; async views run their queries on
+    # connections of other threads, which still see the request's context
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.record_query(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextlib.contextmanager
+def timed_serialization():
+    """Time a block as part of the serialize phase of the current request."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.serialization():
+        yield
+
+
+class TimedSerializerMixin:
+    """
+    Time ``to_representation`` in the serialize phase of the request. With
+    ``many=True`` the list serializer calls it for every item.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class RequestTimingMiddleware:
+    """
+    Count the queries of every request and time its database, application
+    (view code), serialize (serializers with ``TimedSerializerMixin``) and
+    render phases; the application and serialize phases do not include
+    database time.
+
+    The numbers are sent back in a ``Server-Timing`` header and logged as one
+    JSON line to the ``main.timing`` logger. Views can declare a
+    ``query_budget``; going over it logs a warning, or raises
+    ``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT`` is set (in tests).
+
+    Works under WSGI and ASGI alike.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run the sync hooks in a thread on every request
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        request.timings = RequestTimings()
+        token = _current_timings.set(request.timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        request.timings = RequestTimings()
+        token = _current_timings.set(request.timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        timings = request.timings
+        end = time.perf_counter()
+
+        view_start = timings.view_start or timings.start
+        render_start = timings.render_start or end
+        metrics = {
+            'db': timings.db_time,
+            'app': max(
+                render_start - view_start - timings.db_time_before_render
+                - (timings.serialize_time - timings.serialize_db_time), 0,
+            ),
+            'serialize': max(timings.serialize_time - timings.serialize_db_time, 0),
+            'render': end - render_start if timings.render_start else 0,
+            'total': end - timings.start,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.2f}' + (f';desc="{timings.queries} queries"' if name == 'db' else '')
+            for name, duration in metrics.items()
+        )
+
+        view_name = timings.view_class.__name__ if timings.view_class else None
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': view_name,
+            'queries': timings.queries,
+            **{f'{name}_ms': round(duration * 1000, 2) for name, duration in metrics.items()},
+        }))
+
+        budget = getattr(timings.view_class, 'query_budget', None)
+        if budget is not None and timings.queries > budget:
+            message = f'{view_name} ran {timings.queries} queries for {request.method} {request.path}, budget is {budget}'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def view_started(self, request, view_func):
+        request.timings.view_class = getattr(view_func, 'view_class', None)
+        request.timings.view_start = time.perf_counter()
+
+    def render_started(self, request):
+        # Called right before a (DRF) response is rendered
+        request.timings.render_start = time.perf_counter()
+        request.timings.db_time_before_render = request.timings.db_time
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started(request, view_func)
+
+    def process_template_response(self, request, response):
+        self.render_started(request)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        self.render_started(request)
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Keep the database routing state of each request (see main/routers.py)
+    and send users who wrote something to the primary for a while.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+        if state.wrote:
+            self.stick_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        token = routers.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+        if state.wrote:
+            # The user may still have to be loaded, and the cache is sync
+            await sync_to_async(self.stick_to_primary)(request)
+        return response
+
+    def stick_to_primary(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            routers.stick_to_primary(user.pk)
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_group_user_group'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['category', 'level'], name='course_category_level_idx'),
+        ),
+    ]
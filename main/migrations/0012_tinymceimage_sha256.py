@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:48
+
+import main.models
+import main.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tinymceimage',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tinymceimage',
+            name='image',
+            field=models.ImageField(storage=main.uploads.ContentAddressedStorage(), upload_to=main.models.get_image_path),
+        ),
+    ]
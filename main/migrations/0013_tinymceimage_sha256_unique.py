@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:55
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def forget_duplicate_hashes(apps, schema_editor):
+    # Keep the hash on the first of the rows a race stored the same content in
+    TinyMCEImage = apps.get_model('main', 'TinyMCEImage')
+    duplicates = TinyMCEImage.objects.values('sha256').annotate(count=Count('pk')).filter(sha256__isnull=False, count__gt=1)
+    for sha256 in duplicates.values_list('sha256', flat=True):
+        first = TinyMCEImage.objects.filter(sha256=sha256).order_by('pk').first()
+        TinyMCEImage.objects.filter(sha256=sha256).exclude(pk=first.pk).update(sha256=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_tinymceimage_sha256'),
+    ]
+
+    operations = [
+        migrations.RunPython(forget_duplicate_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tinymceimage',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -8,6 +8,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 from django.contrib.auth.models import AbstractUser
 from main.helpers import CustomUserManager
+from main.uploads import ContentAddressedStorage
 
 
 LEVEL_CHOICES = (
@@ -53,6 +54,8 @@ class Category(models.Model):
 
 class Course(models.Model):
     image = models.ImageField(upload_to='courses/%d/%m/%Y/', null=True, blank=True)
+    # Resized WebP copies of `image`, see main/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
     category = models.ForeignKey('Category', on_delete=models.CASCADE, related_name='courses')
@@ -60,6 +63,12 @@ class Course(models.Model):
     description = models.TextField(null=True, blank=True)
     content = HTMLField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Courses of a category filtered by level (CategoryDetailSerializer)
+            models.Index(fields=['category', 'level'], name='course_category_level_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -142,9 +151,35 @@ class QuizResult(models.Model):
     
 
 
+class RevokedToken(models.Model):
+    """An access token that was revoked (e.g. on logout), see main/revocation.py."""
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens', null=True, blank=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    # Rows can be deleted once the token would have expired anyway
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class DeletedUser(models.Model):
+    """A deleted user, whose tokens are still valid until they expire, see main/authentication.py."""
+    user_id = models.BigIntegerField(unique=True)
+    # Rows can be deleted once the user's last token would have expired
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+
 def get_image_path(instance, filename):
-    """Generate a unique path for uploaded images."""
-    ext = filename.split('.')[-1]
+    """Generate a path for uploaded images, named by their SHA-256 when it is known."""
+    ext = filename.split('.')[-1].lower()
+    if instance.sha256:
+        # Content-addressed, see main/uploads.py
+        return os.path.join('uploads', 'tinymce', instance.sha256[:2], f"{instance.sha256}.{ext}")
     # Create a unique filename with uuid
     filename = f"{uuid.uuid4().hex}.{ext}"
     # Return the upload path
@@ -155,11 +190,24 @@ def get_image_path(instance, filename):
 class TinyMCEImage(models.Model):
     """Model to store images uploaded through TinyMCE."""
     title = models.CharField(max_length=255, blank=True)
-    image = models.ImageField(upload_to=get_image_path)
+    image = models.ImageField(upload_to=get_image_path, storage=ContentAddressedStorage())
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Of the content of `image`; unknown for images uploaded before it was added
+    sha256 = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return self.title or f"Image {self.id}"
+
+    @classmethod
+    def from_upload(cls, file, sha256):
+        """
+        The image with the content of ``file``, whose SHA-256 is ``sha256``:
+        the one stored before, or a new one.
+        """
+        # A concurrent upload of the same content gets the row stored first
+        image, created = cls.objects.get_or_create(sha256=sha256, defaults={'title': file.name, 'image': file})
+        return image
     
     def save(self, *args, **kwargs):
         # If no title is provided, use the original filename
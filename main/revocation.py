@@ -0,0 +1,106 @@
+"""
+Revocation of access tokens by their ``jti`` claim.
+
+``RevokedToken`` rows are the authoritative list. Checking it on every
+request would cost a query, so each worker keeps the revoked jtis in a Bloom
+filter: a token that is not in the filter is certainly not revoked, and only
+the rare hits (revoked tokens and false positives) are looked up in the
+database. Revoking bumps the ``revoked``/``all`` version; workers then add
+just the rows they have not seen yet to their filter. The filter is rebuilt
+from scratch when it fills up, which also drops expired tokens.
+"""
+import hashlib
+import math
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from main.models import RevokedToken
+from main.versioning import bump_version, get_version
+
+
+class BloomFilter:
+    """A Bloom filter for strings with a false positive rate of about ``error_rate`` at ``capacity`` items."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """The revoked jtis as seen by one worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.version = None
+        self.last_pk = 0
+        # Filter hits that turned out not to be revoked, until the next change
+        self.not_revoked = set()
+
+    def refresh(self):
+        version = get_version('revoked', 'all')
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            capacity = settings.TOKEN_REVOCATION_CAPACITY
+            if self.filter is None or self.filter.count >= self.filter.capacity:
+                # (Re)build with room to grow; expired tokens are left out
+                live = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+                self.filter = BloomFilter(max(capacity, 2 * live.count()), settings.TOKEN_REVOCATION_ERROR_RATE)
+                self.last_pk = 0
+            rows = RevokedToken.objects.filter(pk__gt=self.last_pk, expires_at__gt=timezone.now())
+            for pk, jti in rows.order_by('pk').values_list('pk', 'jti'):
+                self.filter.add(jti)
+                self.last_pk = pk
+            self.not_revoked = set()
+            self.version = version
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self.filter or jti in self.not_revoked:
+            return False
+        if RevokedToken.objects.filter(jti=jti).exists():
+            return True
+        self.not_revoked.add(jti)
+        return False
+
+
+revocation_list = RevocationList()
+
+
+def is_revoked(token):
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and revocation_list.is_revoked(jti)
+
+
+def revoke(token):
+    """Revoke a validated access token, e.g. on logout."""
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(jti=token[api_settings.JTI_CLAIM], defaults={
+        'user_id': token.get(api_settings.USER_ID_CLAIM),
+        'expires_at': datetime_from_epoch(token['exp']),
+    })
+    bump_version('revoked', 'all')
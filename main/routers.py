@@ -0,0 +1,111 @@
+"""
+Send the reads of the catalog views to read replicas and everything else to
+the primary (``default``) database.
+
+Replicas are the database aliases listed in ``DATABASE_REPLICAS``. A request
+only reads from a replica once a view using ``ReplicaReadsMixin`` has
+authenticated a safe (GET/HEAD/OPTIONS) request, so logins, writes and the
+admin always see the primary. Replicas may lag behind, so:
+
+- a user whose request wrote to the database reads from the primary for
+  ``REPLICA_STICKY_SECONDS`` afterwards, to see their own writes,
+- reads in a request after it wrote go to the primary,
+- ``primary()`` reads from the primary for a block, e.g. before caching data.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+PRIMARY = 'default'
+STICKY_CACHE = 'sticky'
+
+
+class RoutingState:
+    """Routing of the current request, set up by DatabaseRoutingMiddleware."""
+
+    def __init__(self):
+        self.replica = None  # alias to read from, None reads from the primary
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def start_request():
+    return _state.set(RoutingState())
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def _sticky_key(user_id):
+    return f'db-primary:user:{user_id}'
+
+
+def stick_to_primary(user_id):
+    # In the shared cache, the next request may hit another worker
+    caches[STICKY_CACHE].set(_sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def use_replica(user=None):
+    """Read from a replica for the rest of the request, unless ``user`` wrote recently."""
+    state = _state.get()
+    if state is None or state.wrote or not settings.DATABASE_REPLICAS:
+        return
+    if user is not None and user.is_authenticated and caches[STICKY_CACHE].get(_sticky_key(user.pk)):
+        return
+    state.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def use_primary():
+    """Read from the primary for the rest of the request."""
+    state = _state.get()
+    if state is not None:
+        state.replica = None
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block."""
+    state = _state.get()
+    replica = state.replica if state is not None else None
+    use_primary()
+    try:
+        yield
+    finally:
+        if state is not None and not state.wrote:
+            state.replica = replica
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica:
+            return state.replica
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.replica = None
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,109 @@
+"""
+The OpenAPI schema, with drf_yasg loaded only when it is needed.
+
+The views describe themselves with ``swagger_auto_schema`` and ``openapi``
+from this module instead of drf_yasg's: the decorator only records its
+arguments and ``openapi.Parameter(...)`` etc. only record the call, so
+importing the views does not import drf_yasg. ``load`` imports it and
+applies the recorded decorators, which ``get_schema_view`` does before a
+schema is generated.
+
+The schema is generated once, by ``manage.py generate_schema``, into
+``settings.OPENAPI_SCHEMA_FILE``, which ``/swagger/?format=openapi`` serves
+(main/views/schema.py).
+"""
+from functools import cache
+from importlib import import_module
+
+from django.conf import settings
+
+
+class Deferred:
+    """``openapi.<name>``, or a call of it, resolved when drf_yasg is loaded."""
+
+    def __init__(self, name, args=None, kwargs=None):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self, *args, **kwargs):
+        return Deferred(self.name, args, kwargs)
+
+    def __repr__(self):
+        return f'openapi.{self.name}' + ('' if self.args is None else '(...)')
+
+    def resolve(self):
+        from drf_yasg import openapi
+
+        value = getattr(openapi, self.name)
+        if self.args is None:
+            return value
+        return value(*resolve(self.args), **resolve(self.kwargs))
+
+
+def resolve(value):
+    """``value`` with every ``Deferred`` in it, however deeply nested, resolved."""
+    if isinstance(value, Deferred):
+        return value.resolve()
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve(item) for item in value)
+    if isinstance(value, dict):
+        return {key: resolve(item) for key, item in value.items()}
+    return value
+
+
+class LazyOpenAPI:
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Deferred(name)
+
+
+openapi = LazyOpenAPI()
+
+_pending = []
+
+
+def swagger_auto_schema(**kwargs):
+    """drf_yasg's ``swagger_auto_schema``, applied by ``load``."""
+    def decorator(view_method):
+        _pending.append((view_method, kwargs))
+        return view_method
+    return decorator
+
+
+def load():
+    """Import drf_yasg and apply the ``swagger_auto_schema`` decorators recorded so far."""
+    from drf_yasg.utils import swagger_auto_schema
+
+    while _pending:
+        view_method, kwargs = _pending.pop(0)
+        swagger_auto_schema(**resolve(kwargs))(view_method)
+
+
+def get_info():
+    return openapi.Info(
+        title="API Documentation",
+        default_version='v1',
+        description="API documentation for your project",
+    ).resolve()
+
+
+@cache
+def get_schema_view():
+    """drf_yasg's schema view, for the Swagger UI and for when there is no schema file."""
+    # The URLconf imports every view, so all the decorators have been recorded
+    import_module(settings.ROOT_URLCONF)
+    load()
+
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(get_info(), public=True)
+
+
+def generate_schema():
+    """The schema of the API as OpenAPI (Swagger 2.0) JSON."""
+    from drf_yasg.codecs import OpenAPICodecJson
+
+    generator = get_schema_view().generator_class(get_info())
+    return OpenAPICodecJson(validators=[]).encode(generator.get_schema(request=None, public=True))
@@ -1,5 +1,5 @@
 from .auth import LoginSerializer, RegisterSerializer
-from .course import QuizResultProcessSerializer, CategorySerializer, CourseSerializer, \
+from .course import QuizResultProcessSerializer, QuizResultBatchSerializer, CategorySerializer, CourseSerializer, \
 CourseDetailSerializer, QuizSerializer, QuizResultSerializer, QuestionSerializer, OptionSerializer, \
 CategoryDetailSerializer
 from .user import GroupSerializer, UserSerializer
\ No newline at end of file
@@ -1,54 +1,56 @@
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
 from rest_framework import serializers
-from main.models import Category, Quiz, Question, Option, QuizResult, Course, FillInBlankQuestion, FillInBlankOption
+from main.models import Category, Quiz, Question, Option, QuizResult, Course, FillInBlankQuestion, FillInBlankOption, LEVEL_CHOICES
+from main.helpers import StandartCursorPagination
+from main.grading import MULTIPLE_CHOICE, FILL_BLANK, get_answer_key, get_answer_keys
+from main.images import add_srcset, srcset
+from main.middleware import TimedSerializerMixin
+from main.versioning import bump_version
 
 class AnswerSerializer(serializers.Serializer):
     question = serializers.IntegerField()
     option = serializers.IntegerField()
-    question_type = serializers.CharField(default='multiple_choice')  # 'multiple_choice' or 'fill_blank'
+    question_type = serializers.CharField(default=MULTIPLE_CHOICE)  # 'multiple_choice' or 'fill_blank'
 
 class QuizResultProcessSerializer(serializers.Serializer):
     quiz = serializers.PrimaryKeyRelatedField(queryset=Quiz.objects.all())
     answers = AnswerSerializer(many=True)
 
-    def create(self, validated_data):
-        user = self.context['request'].user
-        quiz = validated_data['quiz']
-        answers = validated_data['answers']
-
-        total_questions = (quiz.questions.count() + 
-                          quiz.fill_blank_questions.count())
+    @staticmethod
+    def grade(answer_key, answers):
+        """
+        Grade the answers against a compiled answer key.
+        Returns ``(score, correct_count)``.
+        """
         correct_count = 0
 
-        # Process each answer
         for answer in answers:
-            question_type = answer.get('question_type', 'multiple_choice')
-            
-            if question_type == 'multiple_choice':
-                # Handle regular multiple choice questions
-                try:
-                    question = quiz.questions.get(pk=answer['question'])
-                    option = question.options.get(pk=answer['option'])
-                    if option.is_correct:
-                        correct_count += 1
-                except (Question.DoesNotExist, Option.DoesNotExist):
+            question_type = answer.get('question_type', MULTIPLE_CHOICE)
+            if question_type not in (MULTIPLE_CHOICE, FILL_BLANK):
+                continue
+            try:
+                if answer_key.is_correct(question_type, answer['question'], answer['option']):
+                    correct_count += 1
+            except KeyError:
+                if question_type == MULTIPLE_CHOICE:
                     raise serializers.ValidationError(
                         f"Invalid question or option ID for multiple choice question."
                     )
-            
-            elif question_type == 'fill_blank':
-                # Handle fill-in-the-blank questions
-                try:
-                    question = quiz.fill_blank_questions.get(pk=answer['question'])
-                    option = question.options.get(pk=answer['option'])
-                    if option.text == question.correct_answer:
-                        correct_count += 1
-                except (FillInBlankQuestion.DoesNotExist, FillInBlankOption.DoesNotExist):
-                    raise serializers.ValidationError(
-                        f"Invalid question or option ID for fill-in-blank question."
-                    )
+                raise serializers.ValidationError(
+                    f"Invalid question or option ID for fill-in-blank question."
+                )
 
         # Calculate score as a percentage
+        total_questions = answer_key.total_questions
         score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+        return score, correct_count
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        quiz = validated_data['quiz']
+
+        score, correct_count = self.grade(get_answer_key(quiz.pk), validated_data['answers'])
 
         quiz_result = QuizResult.objects.create(
             user=user, 
@@ -60,6 +62,76 @@ class QuizResultProcessSerializer(serializers.Serializer):
 
 
 
+class QuizResultBatchItemSerializer(serializers.Serializer):
+    quiz = serializers.IntegerField()
+    answers = AnswerSerializer(many=True)
+
+
+class QuizResultBatchSerializer(serializers.Serializer):
+    """
+    Grade many quiz submissions at once. Every submission is validated on its
+    own, so one bad item does not reject the whole batch.
+    """
+    MAX_SUBMISSIONS = 100
+
+    submissions = serializers.ListField(
+        child=serializers.JSONField(), allow_empty=False, max_length=MAX_SUBMISSIONS
+    )
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        submissions = validated_data['submissions']
+        results = [None] * len(submissions)
+
+        items = []
+        for index, data in enumerate(submissions):
+            item = QuizResultBatchItemSerializer(data=data)
+            if item.is_valid():
+                items.append((index, item.validated_data))
+            else:
+                results[index] = {"success": False, "detail": item.errors}
+
+        quiz_ids = set(Quiz.objects.filter(
+            pk__in={data['quiz'] for _, data in items}
+        ).values_list('pk', flat=True))
+        answer_keys = get_answer_keys(list(quiz_ids)) if quiz_ids else {}
+
+        pending = []
+        for index, data in items:
+            if data['quiz'] not in quiz_ids:
+                message = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+                results[index] = {"success": False, "detail": {"quiz": [message.format(pk_value=data['quiz'])]}}
+                continue
+            try:
+                score, correct_count = QuizResultProcessSerializer.grade(answer_keys[data['quiz']], data['answers'])
+            except serializers.ValidationError as e:
+                # By field, like the other errors of an item
+                results[index] = {"success": False, "detail": {"answers": e.detail}}
+                continue
+            pending.append((index, QuizResult(
+                user=user,
+                quiz_id=data['quiz'],
+                score=score,
+                correct_answers=correct_count
+            )))
+
+        if pending:
+            # No savepoint when the view already runs this in a transaction
+            with transaction.atomic(savepoint=False):
+                QuizResult.objects.bulk_create([quiz_result for _, quiz_result in pending])
+                bump_version('results', user.pk)
+
+        for index, quiz_result in pending:
+            results[index] = {
+                "success": True,
+                "quiz_result_id": quiz_result.id,
+                "score": quiz_result.score,
+                "correct_answers": quiz_result.correct_answers
+            }
+        return results
+
+
+
 class OptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Option
@@ -88,7 +160,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'options']
 
 
-class QuizResultSerializer(serializers.ModelSerializer):
+class QuizResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = QuizResult
         fields = ['score', 'correct_answers', 'completed_at']
@@ -104,40 +176,121 @@ class QuizSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = ('id', 'title', 'description', 'created_at', 'result', 'is_completed', 'questions', 'fill_blank_questions')
 
+    def _get_user_result(self, obj):
+        """
+        Return the requesting user's first result for the quiz, or None.
+        Returns None for the ``public`` (user independent) representation,
+        which views cache and merge the user's results into.
+        """
+        request = self.context.get('request')
+        if self.context.get('public') or not (request and request.user.is_authenticated):
+            return None
+        return obj.results.filter(user_id=request.user.pk).first()
+
     def get_result(self, obj):
         """
         Retrieve the user's quiz result if they are authenticated.
         """
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            quiz_result = obj.results.filter(user=request.user).first()
-            if quiz_result:
-                return QuizResultSerializer(quiz_result).data
+        quiz_result = self._get_user_result(obj)
+        if quiz_result:
+            return QuizResultSerializer(quiz_result).data
         return None
 
     def get_is_completed(self, obj):
         """
         Check if the user has completed the quiz if they are authenticated.
         """
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.results.filter(user=request.user).exists()
-        return False
+        return self._get_user_result(obj) is not None
 
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description']
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseListSerializer(serializers.ListSerializer):
+    """
+    Looks up the requesting user's results for a whole page of courses with
+    one query instead of two per course.
+    """
+
+    def to_representation(self, data):
+        courses = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        request = self.context.get('request')
+        if request and request.user.is_authenticated and courses \
+                and not all(hasattr(course, 'user_result') for course in courses):
+            self.attach_user_results(courses, request.user)
+        return super().to_representation(courses)
+
+    @staticmethod
+    def _first_quizzes_query(courses):
+        if all(hasattr(course, 'first_quiz_id') for course in courses):
+            return None
+        return Quiz.objects.filter(course__in=courses).order_by('-pk').values_list('course_id', 'pk')
+
+    @staticmethod
+    def _results_query(first_quizzes, user):
+        return QuizResult.objects.filter(
+            user_id=user.pk, quiz_id__in=[pk for pk in first_quizzes.values() if pk is not None]
+        ).order_by('pk')
+
+    @staticmethod
+    def _attach(courses, first_quizzes, quiz_results):
+        results = {}
+        for quiz_result in quiz_results:
+            results.setdefault(quiz_result.quiz_id, quiz_result)
+        for course in courses:
+            course.user_result = results.get(first_quizzes.get(course.pk))
+
+    @classmethod
+    def attach_user_results(cls, courses, user):
+        query = cls._first_quizzes_query(courses)
+        if query is None:
+            first_quizzes = {course.pk: course.first_quiz_id for course in courses}
+        else:
+            first_quizzes = dict(query)
+        cls._attach(courses, first_quizzes, cls._results_query(first_quizzes, user))
+
+    @classmethod
+    async def aattach_user_results(cls, courses, user):
+        """``attach_user_results`` with the async ORM, for async views."""
+        query = cls._first_quizzes_query(courses)
+        if query is None:
+            first_quizzes = {course.pk: course.first_quiz_id for course in courses}
+        else:
+            first_quizzes = {course_id: quiz_id async for course_id, quiz_id in query}
+        cls._attach(courses, first_quizzes, [result async for result in cls._results_query(first_quizzes, user)])
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """
+    The resized WebP variants of an image (main/images.py) as a srcset-style
+    map of width descriptor to URL, empty until they have been generated.
+    """
+
+    def to_representation(self, value):
+        return srcset(value, self.context.get('request'))
+
+
+class CourseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer()
     result = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField(source='image_variants')
     class Meta:
         model = Course
-        fields = ['id', 'title', 'slug', 'level', 'image', 'category', 'description', 'result']
+        fields = ['id', 'title', 'slug', 'level', 'image', 'image_srcset', 'category', 'description', 'result']
+        list_serializer_class = CourseListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join the category and annotate the id of each course's first quiz,
+        which is the one its ``result`` is taken from.
+        """
+        first_quiz = Quiz.objects.filter(course=OuterRef('pk')).order_by('pk').values('pk')[:1]
+        return queryset.select_related('category').annotate(first_quiz_id=Subquery(first_quiz))
 
     def get_result(self, obj):
         """
@@ -145,45 +298,91 @@ class CourseSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            quizzes = obj.quizzes.first()
-            if quizzes:
-                quiz_result = quizzes.results.filter(user=request.user).first()
-                if quiz_result:
-                    return QuizResultSerializer(quiz_result).data
+            if hasattr(obj, 'user_result'):
+                quiz_result = obj.user_result
+            else:
+                quizzes = obj.quizzes.first()
+                quiz_result = quizzes.results.filter(user_id=request.user.pk).first() if quizzes else None
+            if quiz_result:
+                return QuizResultSerializer(quiz_result).data
             return None
         return None
 
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer()
     quizzes = QuizSerializer(many=True)
+    image_srcset = ImageSrcsetField(source='image_variants')
 
     class Meta:
         model = Course
-        fields = ['id', 'title', 'slug', 'image', 'category', 'description', 'content', 'quizzes']
+        fields = ['id', 'title', 'slug', 'image', 'image_srcset', 'category', 'description', 'content', 'quizzes']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # The resized variants of images uploaded through TinyMCE
+        data['content'] = add_srcset(data['content'], self.context.get('request'))
+        return data
 
 
 
 class CourseForCatSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
+
     class Meta:
         model = Course
         # If Course doesn't actually have a 'level' field, remove it from the list.
-        fields = ['id', 'title', 'slug', 'level', 'image', 'description']
+        fields = ['id', 'title', 'slug', 'level', 'image', 'image_srcset', 'description']
         
         
 
-class CategoryDetailSerializer(serializers.ModelSerializer):
+class CategoryDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    A category with the first page of its courses (optionally filtered by
+    ``?level=``), cursors to the neighbouring pages and course counts per level.
+    """
     courses = serializers.SerializerMethodField()
+    courses_next = serializers.SerializerMethodField()
+    courses_previous = serializers.SerializerMethodField()
+    level_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'courses']
+        fields = ['id', 'name', 'slug', 'description', 'courses', 'courses_next', 'courses_previous', 'level_counts']
 
-    def get_courses(self, obj):
-        request = self.context.get('request')
-        level = request.query_params.get('level') if request else None
-        qs = obj.courses.all()
+    @staticmethod
+    def paginate_courses(category, request):
+        """
+        Return ``(page, paginator)`` of the category's courses for ``request``.
+        Views pass the result in the context as ``course_page``, so each
+        category is paginated once.
+        """
+        level = request.query_params.get('level')
+        qs = category.courses.all()
         if level:
             qs = qs.filter(level=level)
+        paginator = StandartCursorPagination()
+        return paginator.paginate_queryset(qs, request), paginator
+
+    def get_course_page(self, obj):
+        if 'course_page' in self.context:
+            return self.context['course_page']
+        # Without a page from the view, all the courses
+        return obj.courses.order_by('id'), None
+
+    def get_courses(self, obj):
+        page, _ = self.get_course_page(obj)
         # Use CourseForCatSerializer instead of CategoryDetailSerializer here
-        return CourseForCatSerializer(qs, many=True, context=self.context).data
\ No newline at end of file
+        return CourseForCatSerializer(page, many=True, context=self.context).data
+
+    def get_courses_next(self, obj):
+        _, paginator = self.get_course_page(obj)
+        return paginator.get_next_link() if paginator else None
+
+    def get_courses_previous(self, obj):
+        _, paginator = self.get_course_page(obj)
+        return paginator.get_previous_link() if paginator else None
+
+    def get_level_counts(self, obj):
+        counts = dict(obj.courses.order_by().values_list('level').annotate(count=Count('pk')))
+        return {level: counts.get(level, 0) for level, _ in LEVEL_CHOICES}
@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from main.middleware import TimedSerializerMixin
 from main.models import User, Group
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = ['id', 'name']
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'group'] 
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Bump content versions (see main/versioning.py) whenever catalog rows, quiz
+results or inactive users change, and queue the resized variants of new
+images (see main/images.py).
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from main.authentication import denied_user_ids, remember_deleted_user
+from main.images import needs_variants, queue_variants
+from main.models import (
+    Category, Course, Quiz, Question, Option, FillInBlankQuestion, FillInBlankOption, QuizResult, User, TinyMCEImage,
+)
+from main.versioning import bump_version
+
+
+def bump_catalog_version():
+    bump_version('catalog', 'all')
+
+
+def bump_quiz_version(quiz_id, course_id=None):
+    """Invalidate the answer key of a quiz and the cached detail of its course."""
+    if course_id is None:
+        course_id = Quiz.objects.filter(pk=quiz_id).values_list('course_id', flat=True).first()
+    bump_version('quiz', quiz_id)
+    if course_id is not None:
+        bump_version('course', course_id)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    bump_catalog_version()
+    bump_version('category', instance.pk)
+    for course_id in Course.objects.filter(category_id=instance.pk).values_list('pk', flat=True):
+        bump_version('course', course_id)
+
+
+@receiver(pre_save, sender=Course)
+def course_moving(sender, instance, **kwargs):
+    # A course moved to another category disappears from the old one.
+    if instance.pk is None:
+        return
+    old_category_id = Course.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+    if old_category_id is not None and old_category_id != instance.category_id:
+        bump_version('category', old_category_id)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump_catalog_version()
+    bump_version('category', instance.category_id)
+    bump_version('course', instance.pk)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=TinyMCEImage)
+def image_saved(sender, instance, raw=False, **kwargs):
+    # Resized on a background thread once saved, see main/images.py
+    if not raw and needs_variants(instance):
+        queue_variants(instance)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    # The course list shows the result of each course's first quiz.
+    bump_catalog_version()
+    bump_quiz_version(instance.pk, instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=FillInBlankQuestion)
+def question_changed(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+@receiver([post_save, post_delete], sender=FillInBlankOption)
+def option_changed(sender, instance, **kwargs):
+    question_model = instance._meta.get_field('question').related_model
+    ids = question_model.objects.filter(pk=instance.question_id).values_list('quiz_id', 'quiz__course_id').first()
+    if ids is not None:
+        bump_quiz_version(*ids)
+
+
+@receiver([post_save, post_delete], sender=QuizResult)
+def quiz_result_changed(sender, instance, **kwargs):
+    # Bulk inserts skip signals, see QuizResultBatchSerializer.
+    bump_version('results', instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Deactivated, or reactivated. QuerySet.update() skips this.
+    if update_fields is not None and 'is_active' not in update_fields:
+        return  # e.g. last_login, or a password rehash on login
+    if not instance.is_active:
+        bump_version('users', 'denied')
+    elif not created and instance.pk in denied_user_ids():
+        bump_version('users', 'denied')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # In the deleting transaction, so workers reload once it is committed
+    remember_deleted_user(instance.pk)
+    bump_version('users', 'denied')
@@ -0,0 +1,159 @@
+"""
+Cold-start profile of the project, for ``manage.py profile_startup``.
+
+Each probe is a fresh Python process that sets Django up, loads the WSGI
+application and answers one request, the way a new gunicorn worker without
+preloading does, and reports when it got through each phase. One more probe
+runs under ``python -X importtime``, whose report gives the time spent
+importing each module on the way to the first response.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+
+PHASES = ['interpreter', 'setup', 'application', 'first_response']
+
+PROBE = '''
+import io, json, sys, time
+started = time.time()
+
+import django
+django.setup()
+setup = time.time()
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+application = import_string(settings.WSGI_APPLICATION)
+loaded = time.time()
+
+path, _, query = sys.argv[1].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+    'SERVER_NAME': sys.argv[2], 'SERVER_PORT': '80', 'HTTP_HOST': sys.argv[2],
+    'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+    'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+status = []
+body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+responded = time.time()
+print(json.dumps({
+    'started': started, 'setup': setup, 'loaded': loaded, 'responded': responded,
+    'status': int(status[0].split()[0]), 'bytes': len(body),
+}))
+'''
+
+
+@dataclass
+class StartupProfile:
+    path: str
+    # Median of every phase over the probes, in ms
+    phases: dict = field(default_factory=dict)
+    total_ms: float = 0.0
+    status: int = None
+    # From the -X importtime probe: (module, self µs, cumulative µs) in import order
+    imports: list = field(default_factory=list)
+
+    @property
+    def modules(self):
+        return {module for module, _, _ in self.imports}
+
+    def packages(self):
+        """Import time per top-level package, in ms, the largest first."""
+        totals = defaultdict(int)
+        for module, self_us, _ in self.imports:
+            totals[module.partition('.')[0]] += self_us
+        return sorted(((package, us / 1000) for package, us in totals.items()), key=lambda item: -item[1])
+
+    def slowest_imports(self, count):
+        """The ``count`` modules which took the longest to import themselves, in ms."""
+        slowest = sorted(self.imports, key=lambda item: -item[1])[:count]
+        return [(module, self_us / 1000, cumulative_us / 1000) for module, self_us, cumulative_us in slowest]
+
+    def lazy_violations(self, lazy_modules):
+        """The modules of ``lazy_modules``, or their submodules, that were imported."""
+        return sorted(
+            module for module in self.modules
+            if any(module == lazy or module.startswith(lazy + '.') for lazy in lazy_modules)
+        )
+
+    def as_dict(self, top=20):
+        return {
+            'path': self.path,
+            'status': self.status,
+            'phases_ms': self.phases,
+            'total_ms': self.total_ms,
+            'packages_ms': dict(self.packages()),
+            'slowest_imports': [
+                {'module': module, 'self_ms': self_ms, 'cumulative_ms': cumulative_ms}
+                for module, self_ms, cumulative_ms in self.slowest_imports(top)
+            ],
+        }
+
+
+def default_host():
+    return next((host for host in settings.ALLOWED_HOSTS if '*' not in host and not host.startswith('.')), 'localhost')
+
+
+def run_probe(path, host, importtime=False):
+    """
+    Start a process that answers ``path``; return its report and its stderr.
+    Raises RuntimeError unless the process answered with a 2xx status.
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE, path, host]
+    env = {**os.environ, 'WARM_UP': '0'}
+    launched = time.time()
+    process = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+    if process.returncode:
+        raise RuntimeError(f'The startup probe failed:\n{process.stderr[-2000:]}')
+    report = json.loads(process.stdout.strip().splitlines()[-1])
+    if not 200 <= report['status'] < 300:
+        # A failed start is no startup profile
+        raise RuntimeError(f"GET {path} answered {report['status']}:\n{process.stderr[-2000:]}")
+    report['launched'] = launched
+    return report, process.stderr
+
+
+def parse_importtime(output):
+    """``[(module, self µs, cumulative µs)]`` from the output of ``python -X importtime``."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the header
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def profile_startup(path, runs=5, host=None):
+    """Profile ``runs`` cold starts answering ``path``, and the imports of one more."""
+    if runs < 1:
+        raise ValueError(f'runs must be at least 1, got {runs}')
+    host = host or default_host()
+    reports = [run_probe(path, host)[0] for _ in range(runs)]
+    phases = {phase: [] for phase in PHASES + ['total']}
+    for report in reports:
+        marks = [report['launched'], report['started'], report['setup'], report['loaded'], report['responded']]
+        for phase, start, end in zip(PHASES, marks, marks[1:]):
+            phases[phase].append((end - start) * 1000)
+        phases['total'].append((report['responded'] - report['launched']) * 1000)
+    medians = {phase: round(statistics.median(values), 2) for phase, values in phases.items()}
+
+    _, importtime = run_probe(path, host, importtime=True)
+    return StartupProfile(
+        path=path,
+        phases={phase: medians[phase] for phase in PHASES},
+        total_ms=medians['total'],
+        status=reports[-1]['status'],
+        imports=parse_importtime(importtime),
+    )
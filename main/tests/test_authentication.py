@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.utils import timezone
+
+from main import signals
+from main.authentication import ClaimsAccessToken, denied_user_ids
+from main.models import DeletedUser, User
+from main.revocation import revocation_list
+from main.versioning import get_version
+
+
+class DeniedUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+        cls.other_user = User.objects.create_user(email='other@example.com', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+
+    def get_me(self, token):
+        # Reloaded by every process once after a change
+        denied_user_ids()
+        revocation_list.refresh()
+        return self.client.get('/user/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_deactivated_user_is_denied_until_reactivated(self):
+        token = ClaimsAccessToken.for_user(self.user)
+        self.assertEqual(self.get_me(token).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIn(self.user.pk, denied_user_ids())
+        self.assertEqual(self.get_me(token).status_code, 401)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = True
+            self.user.save(update_fields=['is_active'])
+        self.assertNotIn(self.user.pk, denied_user_ids())
+        self.assertEqual(self.get_me(token).status_code, 200)
+
+    def test_other_saves_skip_the_deny_set(self):
+        version = get_version('users', 'denied')
+        with mock.patch.object(signals, 'denied_user_ids') as denied:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.last_login = timezone.now()
+                self.user.save(update_fields=['last_login'])
+                User.objects.create_user(email='new@example.com', password='secret')
+        denied.assert_not_called()
+        self.assertEqual(get_version('users', 'denied'), version)
+
+    def test_deleted_users_are_denied(self):
+        user_ids = [self.user.pk, self.other_user.pk]
+        token = ClaimsAccessToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_user.delete()
+        self.assertLessEqual(set(user_ids), denied_user_ids())
+        self.assertEqual(set(DeletedUser.objects.values_list('user_id', flat=True)), set(user_ids))
+        self.assertEqual(self.get_me(token).status_code, 401)
+
+    def test_deleted_users_are_forgotten_once_their_tokens_expired(self):
+        DeletedUser.objects.create(user_id=1000, expires_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertNotIn(1000, denied_user_ids())
+        self.assertFalse(DeletedUser.objects.filter(user_id=1000).exists())
@@ -0,0 +1,100 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, TestCase
+
+from main.authentication import ClaimsAccessToken, denied_user_ids
+from main.models import Category, Course, Option, Question, Quiz, User
+from main.revocation import revocation_list
+from main.views import CourseView
+from main.views.course_async import AsyncCourseView
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Grammar', slug='grammar')
+        cls.course = Course.objects.create(title='Tenses', slug='tenses', category=cls.category)
+        cls.quiz = Quiz.objects.create(course=cls.course, title='Present simple')
+        question = Question.objects.create(quiz=cls.quiz, text='She ... tea.')
+        cls.option = Option.objects.create(question=question, text='drinks', is_correct=True)
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+        cls.other_user = User.objects.create_user(email='other@example.com', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+        # Loaded once per process, by warm_up() at startup
+        denied_user_ids()
+        revocation_list.refresh()
+
+    def get(self, path, etag=None, user=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        if user:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsAccessToken.for_user(user)}'
+        return self.client.get(path, **headers)
+
+    def assert_revalidates(self, path):
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        response = self.get(path, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_unchanged_content_is_not_modified(self):
+        for path in ('/category/', '/category/grammar/', '/course/', '/course/tenses/', '/async/category/grammar/',
+                     '/async/course/', '/async/course/tenses/'):
+            with self.subTest(path):
+                self.assert_revalidates(path)
+
+    def test_changed_content_is_sent_again(self):
+        for path in ('/course/tenses/', '/async/course/tenses/'):
+            with self.subTest(path):
+                etag = self.assert_revalidates(path)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.course.title = f'{path} renamed'
+                    self.course.save()
+                # Within the same second as the previous response
+                response = self.get(path, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['title'], f'{path} renamed')
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_is_per_user(self):
+        response = self.get('/course/tenses/', user=self.user)
+        etag = response['ETag']
+        self.assertEqual(self.get('/course/tenses/', etag, user=self.user).status_code, 304)
+        self.assertEqual(self.get('/course/tenses/', etag, user=self.other_user).status_code, 200)
+        self.assertEqual(self.get('/course/tenses/', etag).status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_submitted_quiz_is_sent_again(self):
+        etag = self.get('/course/tenses/', user=self.user)['ETag']
+        other_etag = self.get('/course/tenses/', user=self.other_user)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/course/tenses/submit-quiz',
+                {'quiz': self.quiz.pk, 'answers': [{'question': self.option.question_id, 'option': self.option.pk}]},
+                content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(self.user)}',
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        response = self.get('/course/tenses/', etag, user=self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['quizzes'][0]['is_completed'])
+        # Other users' responses did not change
+        self.assertEqual(self.get('/course/tenses/', other_etag, user=self.other_user).status_code, 304)
+
+    def test_version_scope_is_required(self):
+        request = RequestFactory().get('/course/')
+        view = type('View', (CourseView,), {'version_scope': None}).as_view()
+        with self.assertRaises(ImproperlyConfigured):
+            view(request)
+        async_view = type('View', (AsyncCourseView,), {'version_scope': None}).as_view()
+        with self.assertRaises(ImproperlyConfigured):
+            async_to_sync(async_view)(request)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from main.models import Category, Course, QuizResult, RevokedToken, User
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, *args):
+        call_command(
+            'generate_data', '--users', '20', '--groups', '2', '--categories', '2', '--courses', '4',
+            '--results', '50', *args, stdout=StringIO(),
+        )
+
+    def test_results_are_scored_from_their_correct_answers(self):
+        self.generate()
+        self.assertEqual(User.objects.filter(is_staff=False).count(), 20)
+        self.assertEqual(Course.objects.count(), 4)
+        # 10 multiple choice and 5 fill-in-blank questions per quiz by default
+        for score, correct_answers in QuizResult.objects.values_list('score', 'correct_answers'):
+            self.assertAlmostEqual(float(score), correct_answers / 15 * 100, places=2)
+
+    def test_existing_data_needs_clear(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+    def test_clear_deletes_revoked_tokens_of_the_users(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret')
+        self.generate()
+        expires_at = timezone.now() + timedelta(days=1)
+        RevokedToken.objects.create(jti='student', user=User.objects.filter(is_staff=False).first(), expires_at=expires_at)
+        RevokedToken.objects.create(jti='admin', user=admin, expires_at=expires_at)
+
+        self.generate('--clear', '--seed', '7')
+        # SQLite checks foreign keys on commit, which a TestCase never does
+        connection.check_constraints()
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['admin'])
+        self.assertEqual(User.objects.filter(is_staff=False).count(), 20)
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertTrue(User.objects.filter(pk=admin.pk).exists())
@@ -0,0 +1,214 @@
+import random
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from main.grading import FILL_BLANK, MULTIPLE_CHOICE, AnswerKey, get_answer_key
+from main.models import (
+    Category, Course, FillInBlankOption, FillInBlankQuestion, Option, Question, Quiz, QuizResult, User,
+)
+from main.serializers.course import QuizResultProcessSerializer
+
+
+def grade_per_answer(quiz, answers):
+    """How quizzes were graded before answer keys: a query per answer."""
+    total_questions = quiz.questions.count() + quiz.fill_blank_questions.count()
+    correct_count = 0
+    for answer in answers:
+        question_type = answer.get('question_type', MULTIPLE_CHOICE)
+        if question_type == MULTIPLE_CHOICE:
+            try:
+                question = quiz.questions.get(pk=answer['question'])
+                if question.options.get(pk=answer['option']).is_correct:
+                    correct_count += 1
+            except (Question.DoesNotExist, Option.DoesNotExist):
+                raise serializers.ValidationError('Invalid question or option ID for multiple choice question.')
+        elif question_type == FILL_BLANK:
+            try:
+                question = quiz.fill_blank_questions.get(pk=answer['question'])
+                if question.options.get(pk=answer['option']).text == question.correct_answer:
+                    correct_count += 1
+            except (FillInBlankQuestion.DoesNotExist, FillInBlankOption.DoesNotExist):
+                raise serializers.ValidationError('Invalid question or option ID for fill-in-blank question.')
+    score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+    return score, correct_count
+
+
+def outcome(grade, *args):
+    try:
+        return grade(*args)
+    except serializers.ValidationError:
+        return 'invalid'
+
+
+class GradingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Grammar', slug='grammar')
+        cls.course = Course.objects.create(title='Conjunctions', slug='conjunctions', category=category)
+        cls.quiz = Quiz.objects.create(course=cls.course, title='Both, either, neither')
+        cls.other_quiz = Quiz.objects.create(course=cls.course, title='So, such')
+        cls.empty_quiz = Quiz.objects.create(course=cls.course, title='Empty')
+
+        for quiz, count in ((cls.quiz, 3), (cls.other_quiz, 1)):
+            for number in range(count):
+                question = Question.objects.create(quiz=quiz, text=f'Question {number}')
+                for text, is_correct in (('a', False), ('b', number != 2), ('c', False)):
+                    Option.objects.create(question=question, text=text, is_correct=is_correct)
+        # A question nobody can answer right, and one without options
+        Question.objects.create(quiz=cls.quiz, text='No options')
+
+        for quiz, count in ((cls.quiz, 2), (cls.other_quiz, 1)):
+            for number in range(count):
+                question = FillInBlankQuestion.objects.create(
+                    quiz=quiz, text_before=f'I like {number}', text_after='of them.', correct_answer='both',
+                )
+                for text in ('both', 'either', 'neither'):
+                    FillInBlankOption.objects.create(question=question, text=text)
+        FillInBlankQuestion.objects.create(quiz=cls.quiz, text_before='No options', correct_answer='both')
+
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+
+    def random_answers(self, rng):
+        """Answers to the quiz, with some to questions and options of other quizzes and questions."""
+        multiple_choice = list(Option.objects.values_list('question_id', 'pk'))
+        fill_blank = list(FillInBlankOption.objects.values_list('question_id', 'pk'))
+        question_ids = list(Question.objects.values_list('pk', flat=True))
+        fill_blank_question_ids = list(FillInBlankQuestion.objects.values_list('pk', flat=True))
+        answers = []
+        for _ in range(rng.randint(0, 8)):
+            question_type = rng.choice([MULTIPLE_CHOICE, MULTIPLE_CHOICE, FILL_BLANK, FILL_BLANK, 'essay'])
+            pairs, questions = (
+                (fill_blank, fill_blank_question_ids) if question_type == FILL_BLANK
+                else (multiple_choice, question_ids)
+            )
+            question, option = rng.choice(pairs)
+            if rng.random() < 0.05:
+                question = rng.choice(questions)
+            answers.append({'question': question, 'option': option, 'question_type': question_type})
+        return answers
+
+    def test_answer_key_grades_like_per_answer_queries(self):
+        rng = random.Random(0)
+        quizzes = [self.quiz, self.other_quiz, self.empty_quiz]
+        keys = AnswerKey.compile([quiz.pk for quiz in quizzes])
+        checked = {'invalid': 0, 'valid': 0}
+        for _ in range(300):
+            quiz = rng.choice(quizzes)
+            answers = self.random_answers(rng)
+            expected = outcome(grade_per_answer, quiz, answers)
+            self.assertEqual(outcome(QuizResultProcessSerializer.grade, keys[quiz.pk], answers), expected, answers)
+            checked['invalid' if expected == 'invalid' else 'valid'] += 1
+        # Both paths were exercised
+        self.assertGreater(checked['invalid'], 20)
+        self.assertGreater(checked['valid'], 20)
+
+    def test_answer_key_of_every_quiz(self):
+        keys = AnswerKey.compile([self.quiz.pk, self.other_quiz.pk, self.empty_quiz.pk])
+        self.assertEqual(keys[self.quiz.pk].total_questions, 4 + 3)
+        self.assertEqual(keys[self.other_quiz.pk].total_questions, 1 + 1)
+        self.assertEqual(keys[self.empty_quiz.pk].total_questions, 0)
+        for quiz_id, key in keys.items():
+            self.assertEqual(AnswerKey.compile([quiz_id])[quiz_id].questions, key.questions)
+
+    def test_submitted_score_matches_per_answer_grading(self):
+        answers = [
+            {'question': question_id, 'option': option_id, 'question_type': MULTIPLE_CHOICE}
+            for question_id, option_id in Option.objects.filter(question__quiz=self.quiz, text='b')
+            .values_list('question_id', 'pk')
+        ] + [
+            {'question': question_id, 'option': option_id, 'question_type': FILL_BLANK}
+            for question_id, option_id in FillInBlankOption.objects.filter(question__quiz=self.quiz, text='both')
+            .values_list('question_id', 'pk')
+        ]
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            f'/course/{self.course.slug}/submit-quiz', {'quiz': self.quiz.pk, 'answers': answers}, format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+
+        score, correct_count = grade_per_answer(self.quiz, answers)
+        self.assertEqual(correct_count, 4)
+        result = QuizResult.objects.get(pk=response.data['quiz_result_id'])
+        self.assertAlmostEqual(float(result.score), score, places=2)
+        self.assertEqual(result.correct_answers, correct_count)
+
+    def test_cached_answer_key_is_reused(self):
+        get_answer_key(self.quiz.pk)
+        with self.assertNumQueries(0):
+            get_answer_key(self.quiz.pk)
+
+    def test_answer_key_rebuilt_after_option_edit(self):
+        question = Question.objects.get(quiz=self.quiz, text='Question 2')
+        option = question.options.get(text='a')
+        self.assertFalse(get_answer_key(self.quiz.pk).is_correct(MULTIPLE_CHOICE, question.pk, option.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option.is_correct = True
+            option.save()
+        self.assertTrue(get_answer_key(self.quiz.pk).is_correct(MULTIPLE_CHOICE, question.pk, option.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_option = Option.objects.create(question=question, text='d', is_correct=True)
+        self.assertTrue(get_answer_key(self.quiz.pk).is_correct(MULTIPLE_CHOICE, question.pk, new_option.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option.delete()
+        with self.assertRaises(KeyError):
+            get_answer_key(self.quiz.pk).is_correct(MULTIPLE_CHOICE, question.pk, option.pk)
+
+    def test_answer_key_rebuilt_after_fill_blank_option_edit(self):
+        question = FillInBlankQuestion.objects.filter(quiz=self.quiz).first()
+        option = question.options.get(text='either')
+        self.assertFalse(get_answer_key(self.quiz.pk).is_correct(FILL_BLANK, question.pk, option.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.correct_answer = 'either'
+            question.save()
+        self.assertTrue(get_answer_key(self.quiz.pk).is_correct(FILL_BLANK, question.pk, option.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option.text = 'neither'
+            option.save()
+        self.assertFalse(get_answer_key(self.quiz.pk).is_correct(FILL_BLANK, question.pk, option.pk))
+
+    def test_other_quizzes_keep_their_cached_key(self):
+        get_answer_key(self.other_quiz.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Option.objects.filter(question__quiz=self.quiz).first().save()
+        with self.assertNumQueries(0):
+            get_answer_key(self.other_quiz.pk)
+
+    def test_batch_with_valid_and_invalid_submissions(self):
+        option = Option.objects.get(question__quiz=self.other_quiz, text='b')
+        other_option = Option.objects.get(question__quiz=self.quiz, text='b', question__text='Question 0')
+        submissions = [
+            {'quiz': self.other_quiz.pk, 'answers': [{'question': option.question_id, 'option': option.pk}]},
+            {'quiz': self.other_quiz.pk, 'answers': [{'question': option.question_id, 'option': other_option.pk}]},
+            {'quiz': 0, 'answers': []},
+            {'answers': []},
+            'not a submission',
+        ]
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/submit-quizzes/', {'submissions': submissions}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        results = response.json()['results']
+        self.assertEqual([result['success'] for result in results], [True, False, False, False, False])
+        self.assertEqual(results[0]['correct_answers'], 1)
+        self.assertTrue(QuizResult.objects.filter(pk=results[0]['quiz_result_id'], quiz=self.other_quiz).exists())
+        # Every error is by field
+        self.assertEqual(
+            results[1]['detail'], {'answers': ['Invalid question or option ID for multiple choice question.']},
+        )
+        self.assertEqual(list(results[2]['detail']), ['quiz'])
+        self.assertEqual(list(results[3]['detail']), ['quiz'])
+        self.assertEqual(list(results[4]['detail']), ['non_field_errors'])
@@ -0,0 +1,75 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+
+from main import hashing
+from main.hashing import HashingPool, HashingPoolSaturated
+from main.models import User
+
+
+class SaturatedHashingPoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser(email='admin@example.com', password='secret')
+
+    def setUp(self):
+        patcher = mock.patch.object(HashingPool, 'run', side_effect=HashingPoolSaturated)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_api_login_gets_503(self):
+        response = self.client.post('/login/', {'email': 'admin@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_admin_login_fails_like_a_wrong_password(self):
+        response = self.client.post('/admin/login/', {'username': 'admin@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class HashingPoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+
+    def login(self):
+        return self.client.post('/login/', {'email': 'student@example.com', 'password': 'secret'})
+
+    def test_full_pool_rejects_logins(self):
+        pool = HashingPool(workers=1, queue_size=0)
+        patcher = mock.patch.object(hashing, 'get_pool', return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        started, release = threading.Event(), threading.Event()
+
+        def hash_slowly():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=pool.run, args=(hash_slowly,))
+        thread.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingPoolSaturated):
+                pool.run(make_password, 'other')
+            self.assertEqual(self.login().status_code, 503)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.login().status_code, 200)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.MD5PasswordHasher', 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ])
+    def test_outdated_hash_is_replaced_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('secret', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login().status_code, 200)
+        password = User.objects.values_list('password', flat=True).get(pk=self.user.pk)
+        self.assertTrue(password.startswith('md5$'), password)
+        # The new hash is checked like any other
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(User.objects.values_list('password', flat=True).get(pk=self.user.pk), password)
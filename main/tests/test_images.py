@@ -0,0 +1,55 @@
+import io
+import threading
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+
+from main import images
+from main.models import Category, Course
+
+
+def png(name, width=800, height=400):
+    content = io.BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Grammar', slug='grammar')
+        self.course = Course.objects.create(title='Tenses', slug='tenses', category=category, image=png('first.png'))
+
+    def variant_names(self):
+        self.course.refresh_from_db()
+        return {entry['name'] for variant, entry in self.course.image_variants.items() if variant != 'source'}
+
+    def test_variants_of_a_replaced_image_are_deleted(self):
+        self.assertTrue(images.generate_variants(Course, self.course.pk))
+        first = self.variant_names()
+        self.assertEqual(len(first), 3)
+        self.assertTrue(all(default_storage.exists(name) for name in first))
+
+        self.course.image = png('second.png')
+        self.course.save()
+        self.assertTrue(images.generate_variants(Course, self.course.pk))
+        second = self.variant_names()
+        self.assertTrue(all(default_storage.exists(name) for name in second))
+        self.assertFalse(any(default_storage.exists(name) for name in first))
+
+        self.course.image = None
+        self.course.save()
+        self.assertTrue(images.generate_variants(Course, self.course.pk))
+        self.assertEqual(self.variant_names(), set())
+        self.assertFalse(any(default_storage.exists(name) for name in second))
+
+    def test_finish_pending_waits_for_queued_variants(self):
+        started, release, done = threading.Event(), threading.Event(), []
+        images.get_executor().submit(lambda: (started.set(), release.wait(), done.append(True)))
+        started.wait()
+        threading.Timer(0.1, release.set).start()
+        images.finish_pending()
+        self.assertEqual(done, [True])
+        # A new executor for variants queued afterwards
+        self.assertEqual(images.get_executor().submit(lambda: 1).result(), 1)
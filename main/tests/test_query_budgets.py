@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.serializers import BaseSerializer
+
+from main.authentication import ClaimsAccessToken, denied_user_ids
+from main.middleware import QueryBudgetExceeded
+from main.models import (
+    Category, Course, Enrollment, FillInBlankOption, FillInBlankQuestion, Group, Option, Question, Quiz, QuizResult,
+    User,
+)
+from main.revocation import revocation_list
+from main.views import CourseCategoryView
+
+
+def budgeted_views(patterns=None):
+    """The view classes routed in the project that declare a ``query_budget``."""
+    views = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            views |= budgeted_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if getattr(view_class, 'query_budget', None) is not None:
+                views.add(view_class)
+    return views
+
+
+class QueryBudgetTests(TestCase):
+    """Every view with a ``query_budget`` keeps to it (QUERY_BUDGET_STRICT is set in tests)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='Morning')
+        cls.user = User.objects.create_user(email='student@example.com', password='secret', group=group)
+        for number in range(3):
+            category = Category.objects.create(name=f'Category {number}', slug=f'category-{number}')
+            for level in ('a1', 'a2', 'b1'):
+                course = Course.objects.create(
+                    title=f'Course {number} {level}', slug=f'course-{number}-{level}', category=category, level=level,
+                    content='<p>Text</p>',
+                )
+                Enrollment.objects.create(user=cls.user, course=course)
+                for quiz_number in range(2):
+                    quiz = Quiz.objects.create(course=course, title=f'Quiz {quiz_number}')
+                    for question_number in range(3):
+                        question = Question.objects.create(quiz=quiz, text=f'Question {question_number}')
+                        for text in 'abc':
+                            Option.objects.create(question=question, text=text, is_correct=text == 'b')
+                        blank = FillInBlankQuestion.objects.create(
+                            quiz=quiz, text_before='I like', text_after='of them.', correct_answer='both',
+                        )
+                        for text in ('both', 'either'):
+                            FillInBlankOption.objects.create(question=blank, text=text)
+                    QuizResult.objects.create(user=cls.user, quiz=quiz, score=50, correct_answers=3)
+        cls.course = Course.objects.get(slug='course-0-a1')
+        cls.quiz = cls.course.quizzes.first()
+
+    def setUp(self):
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+        cache.clear()
+        caches['versions'].clear()
+        # Loaded once per process, by warm_up() at startup
+        denied_user_ids()
+        revocation_list.refresh()
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {ClaimsAccessToken.for_user(self.user)}'}
+        self.seen = set()
+
+    def request(self, method, path, expected_status, data=None, **headers):
+        response = getattr(self.client, method)(
+            path, data, content_type='application/json', **self.headers, **headers,
+        ) if data is not None else getattr(self.client, method)(path, **self.headers, **headers)
+        self.assertEqual(response.status_code, expected_status, f'{method.upper()} {path}: {response.content[:500]}')
+        self.seen.add(response.resolver_match.func.view_class)
+        return response
+
+    def answers(self):
+        return [
+            {'question': question_id, 'option': option_id}
+            for question_id, option_id in Option.objects.filter(question__quiz=self.quiz, is_correct=True)
+            .values_list('question_id', 'pk')
+        ]
+
+    def test_every_budgeted_view(self):
+        course, category = self.course.slug, self.course.category.slug
+        for path in ('/category/', f'/category/{category}/', f'/category/{category}/?level=a2', '/course/',
+                     '/course/?cursor=', f'/course/{course}/', f'/async/category/{category}/', '/async/course/',
+                     f'/async/course/{course}/', '/user/', '/user/me/', '/groups/'):
+            # Cold caches, then warm ones
+            self.request('get', path, 200)
+            self.request('get', path, 200)
+        Enrollment.objects.filter(user=self.user, course=self.course).delete()
+        self.request('post', f'/enroll/{course}/', 201)
+        self.request('post', f'/enroll/{course}/', 200)
+        submission = {'quiz': self.quiz.pk, 'answers': self.answers()}
+        self.request('post', f'/course/{course}/submit-quiz', 201, submission)
+        self.request('post', f'/async/course/{course}/submit-quiz', 201, submission)
+        self.request('post', '/submit-quizzes/', 201, {'submissions': [submission] * 10})
+
+        self.assertEqual(budgeted_views() - self.seen, set())
+
+    def test_going_over_the_budget_raises(self):
+        with mock.patch.object(CourseCategoryView, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/category/')
+
+    def test_server_timing_has_a_serialize_phase(self):
+        response = self.client.get(f'/course/{self.course.slug}/')
+        phases = dict(metric.split(';', 2)[0:2] for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(set(phases), {'db', 'app', 'serialize', 'render', 'total'})
+        self.assertGreater(float(phases['serialize'].removeprefix('dur=')), 0)
+        # Timed by TimedSerializerMixin, DRF's serializers are left as they are
+        self.assertEqual(BaseSerializer.data.fget.__module__, 'rest_framework.serializers')
@@ -0,0 +1,122 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.utils import timezone
+
+from main import revocation
+from main.authentication import denied_user_ids
+from main.models import RevokedToken, User
+from main.revocation import BloomFilter, RevocationList
+from main.versioning import bump_version
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, error_rate=0.01)
+        items = [uuid.uuid4().hex for _ in range(5000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+        others = [uuid.uuid4().hex for _ in range(20000)]
+        false_positives = sum(item in bloom for item in others)
+        self.assertLess(false_positives / len(others), 0.03)
+
+    def test_no_false_negatives_past_capacity(self):
+        bloom = BloomFilter(10, error_rate=0.001)
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertEqual(bloom.count, 1000)
+
+
+class RevocationListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+        self.revocation_list = RevocationList()
+        patcher = mock.patch.object(revocation, 'revocation_list', self.revocation_list)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def revoke(self, jti, expires_in=timedelta(days=1)):
+        with self.captureOnCommitCallbacks(execute=True):
+            RevokedToken.objects.create(jti=jti, user=self.user, expires_at=timezone.now() + expires_in)
+            bump_version('revoked', 'all')
+
+    def test_reload_adds_only_new_tokens(self):
+        self.revoke('first')
+        self.assertTrue(self.revocation_list.is_revoked('first'))
+        bloom = self.revocation_list.filter
+
+        self.revoke('second')
+        with self.assertNumQueries(1):
+            self.revocation_list.refresh()
+        self.assertIs(self.revocation_list.filter, bloom)
+        self.assertEqual(bloom.count, 2)
+        self.assertTrue(self.revocation_list.is_revoked('first'))
+        self.assertTrue(self.revocation_list.is_revoked('second'))
+        self.assertFalse(self.revocation_list.is_revoked('third'))
+
+    def test_no_reload_without_a_new_token(self):
+        self.revocation_list.refresh()
+        with self.assertNumQueries(0):
+            self.assertFalse(self.revocation_list.is_revoked('unknown'))
+
+    def test_expired_tokens_are_left_out(self):
+        self.revoke('expired', expires_in=-timedelta(minutes=1))
+        self.revoke('live')
+        self.assertFalse(self.revocation_list.is_revoked('expired'))
+        self.assertTrue(self.revocation_list.is_revoked('live'))
+
+    def test_full_filter_is_rebuilt(self):
+        with self.settings(TOKEN_REVOCATION_CAPACITY=2):
+            self.revoke('first')
+            self.revocation_list.refresh()
+            self.revoke('second')
+            self.revocation_list.refresh()
+            bloom = self.revocation_list.filter
+            self.assertEqual((bloom.count, bloom.capacity), (2, 2))
+            self.revoke('third')
+            self.assertTrue(self.revocation_list.is_revoked('third'))
+            self.assertIsNot(self.revocation_list.filter, bloom)
+            self.assertTrue(all(self.revocation_list.is_revoked(jti) for jti in ('first', 'second', 'third')))
+
+    def test_false_positive_is_looked_up_once(self):
+        self.revoke('revoked')
+        self.revocation_list.refresh()
+        with mock.patch.object(BloomFilter, '__contains__', return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(self.revocation_list.is_revoked('not-revoked'))
+                self.assertFalse(self.revocation_list.is_revoked('not-revoked'))
+
+    def test_logged_out_token_is_rejected(self):
+        response = self.client.post('/login/', {'email': 'student@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200, response.content)
+        token = response.json()['token']
+        other_token = self.client.post('/login/', {'email': 'student@example.com', 'password': 'secret'}).json()['token']
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        # Loaded once per process, by warm_up() at startup
+        denied_user_ids()
+        self.revocation_list.refresh()
+
+        self.assertEqual(self.client.get('/user/me/', **headers).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/logout/', **headers).status_code, 200)
+        # Every process reloads the list once, before its next request is checked
+        with self.assertNumQueries(1):
+            self.revocation_list.refresh()
+
+        self.assertEqual(self.client.get('/user/me/', **headers).status_code, 401)
+        self.assertEqual(self.client.get('/course/', **headers).status_code, 401)
+        self.assertEqual(self.client.post('/logout/', **headers).status_code, 401)
+        # Other sessions of the user go on
+        self.assertEqual(self.client.get('/user/me/', HTTP_AUTHORIZATION=f'Bearer {other_token}').status_code, 200)
@@ -0,0 +1,127 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from main import routers, versioning
+from main.authentication import ClaimsAccessToken, denied_user_ids
+from main.models import Category, Course, Enrollment, Quiz, QuizResult, TinyMCEImage, User
+from main.revocation import revocation_list
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTests(TestCase):
+    """
+    ``replica1`` is a second SQLite database here, not a mirror of the
+    primary, so every read shows which database it went to.
+    """
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        for database in ('default', 'replica1'):
+            category = Category.objects.using(database).create(name=f'On {database}', slug='grammar')
+            course = Course.objects.using(database).create(title=f'On {database}', slug='tenses', category=category)
+            Quiz.objects.using(database).create(course=course, title='Tenses')
+        cls.user = User.objects.create_user(email='student@example.com', password='secret')
+        cls.other_user = User.objects.create_user(email='other@example.com', password='secret')
+        cls.course = Course.objects.get(slug='tenses')
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+        caches[routers.STICKY_CACHE].clear()
+        # Content last changed a minute ago, see test_recent_changes_are_read_from_the_primary
+        patcher = mock.patch.object(versioning, 'new_token', lambda: format(time.time_ns() - 60 * 10 ** 9, 'x'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Loaded once per process, by warm_up() at startup
+        denied_user_ids()
+        revocation_list.refresh()
+
+    def get(self, path, user=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {ClaimsAccessToken.for_user(user)}'} if user else {}
+        # Only the sticky cache keeps the sticky flags
+        cache.clear()
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def category_names(self, user=None):
+        return [category['name'] for category in self.get('/category/', user)]
+
+    def test_catalog_reads_go_to_the_replica(self):
+        self.assertEqual(self.category_names(), ['On replica1'])
+        self.assertEqual(self.category_names(self.user), ['On replica1'])
+        self.assertEqual(self.get('/category/grammar/')['name'], 'On replica1')
+        self.assertEqual([course['title'] for course in self.get('/course/')['results']], ['On replica1'])
+        # Except the shared part of a course page, which is cached from the primary
+        self.assertEqual(self.get('/course/tenses/')['title'], 'On default')
+
+    def test_other_reads_go_to_the_primary(self):
+        self.assertEqual([course['title'] for course in self.get('/user/', self.user)], [])
+        with self.routing() as state:
+            self.assertEqual(Category.objects.get().name, 'On default')
+            state.replica = 'replica1'
+            self.assertEqual(Category.objects.get().name, 'On replica1')
+            with routers.primary():
+                self.assertEqual(Category.objects.get().name, 'On default')
+            self.assertEqual(Category.objects.get().name, 'On replica1')
+
+    @contextmanager
+    def routing(self):
+        # What DatabaseRoutingMiddleware does around a request
+        token = routers.start_request()
+        try:
+            yield routers._state.get()
+        finally:
+            self.state = routers.end_request(token)
+
+    def assert_written_to_primary(self, model, create):
+        with self.routing() as state:
+            state.replica = 'replica1'
+            instance = create()
+            # Reads after a write in the same request see it
+            self.assertIsNone(state.replica)
+            self.assertTrue(model.objects.filter(pk=instance.pk).exists())
+        self.assertTrue(self.state.wrote)
+        self.assertEqual(instance._state.db, 'default')
+        self.assertTrue(model.objects.using('default').filter(pk=instance.pk).exists())
+        self.assertFalse(model.objects.using('replica1').filter(pk=instance.pk).exists())
+
+    def test_writes_go_to_the_primary(self):
+        quiz = Quiz.objects.get()
+        self.assert_written_to_primary(
+            QuizResult, lambda: QuizResult.objects.create(user=self.user, quiz=quiz, score=100, correct_answers=1),
+        )
+        self.assert_written_to_primary(Enrollment, lambda: Enrollment.objects.create(user=self.user, course=self.course))
+        self.assert_written_to_primary(User, lambda: User.objects.create_user(email='new@example.com', password='x'))
+        self.assert_written_to_primary(
+            TinyMCEImage, lambda: TinyMCEImage.objects.create(title='photo.png', image='uploads/tinymce/photo.png'),
+        )
+
+    def test_writer_reads_from_the_primary_while_sticky(self):
+        Category.objects.using('default').filter(slug='grammar').update(name='Renamed on default')
+        response = self.client.post(
+            '/enroll/tenses/', HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(self.user)}',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Enrollment.objects.using('default').filter(user=self.user).exists())
+        self.assertFalse(Enrollment.objects.using('replica1').exists())
+
+        # The writer sees the primary, everyone else the replica
+        self.assertEqual(self.category_names(self.user), ['Renamed on default'])
+        self.assertEqual(self.category_names(self.other_user), ['On replica1'])
+        self.assertEqual(self.category_names(), ['On replica1'])
+
+        # Once the sticky window is over, the writer is back on the replica
+        caches[routers.STICKY_CACHE].delete(routers._sticky_key(self.user.pk))
+        self.assertEqual(self.category_names(self.user), ['On replica1'])
+
+    def test_recent_changes_are_read_from_the_primary(self):
+        self.assertEqual(self.category_names(), ['On replica1'])
+        # A replica may not have them yet
+        caches['versions'].set(versioning._version_key('catalog', 'all'), format(time.time_ns(), 'x'))
+        self.assertEqual(self.category_names(), ['On default'])
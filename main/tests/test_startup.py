@@ -0,0 +1,21 @@
+import json
+import subprocess
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+
+class ProfileStartupTests(SimpleTestCase):
+    def probe(self, status):
+        report = {'started': 1.0, 'setup': 2.0, 'loaded': 3.0, 'responded': 4.0, 'status': status, 'bytes': 0}
+        return subprocess.CompletedProcess([], 0, stdout=json.dumps(report) + '\n', stderr='Traceback: no such table')
+
+    def test_error_response_fails_the_command(self):
+        with mock.patch('main.startup.subprocess.run', return_value=self.probe(500)):
+            with self.assertRaisesMessage(CommandError, 'GET /course/ answered 500'):
+                call_command('profile_startup', '--runs', '1')
+
+    def test_runs_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('profile_startup', '--runs', '0')
@@ -0,0 +1,72 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase
+
+from main import user_import
+from main.models import User
+from main.user_import import ROW_ERROR, hash_passwords, import_users, read_rows
+
+
+class UserImportTests(TestCase):
+    def test_jsonl_rows_that_are_not_objects_are_errors(self):
+        file = io.BytesIO(
+            b'{"email": "first@example.com"}\n'
+            b'["second@example.com"]\n'
+            b'"third@example.com"\n'
+            b'\n'
+            b'{"email": \n'
+            b'{"email": "fourth@example.com"}\n'
+        )
+        rows = list(read_rows(file, 'jsonl'))
+        self.assertEqual([line for line, _ in rows], [1, 2, 3, 5, 6])
+        self.assertEqual(rows[1][1], {ROW_ERROR: 'expected a JSON object, got list'})
+        self.assertEqual(rows[2][1], {ROW_ERROR: 'expected a JSON object, got str'})
+
+        report = import_users(rows, processes=1)
+        self.assertEqual([user.email for user in report.created], ['first@example.com', 'fourth@example.com'])
+        self.assertEqual([line for line, _ in report.errors], [2, 3, 5])
+
+    def test_csv_column_named_error_is_data(self):
+        file = io.StringIO('email,error,first_name\nfirst@example.com,late,Ann\n')
+        report = import_users(read_rows(file, 'csv'), processes=1)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(User.objects.get(email='first@example.com').first_name, 'Ann')
+
+    def test_passwords_hashed_in_spawned_processes(self):
+        passwords = ['secret', None, 'other']
+        hashed = hash_passwords(passwords, processes=2)
+        self.assertTrue(check_password('secret', hashed[0]))
+        self.assertFalse(check_password('', hashed[1]))
+        self.assertTrue(check_password('other', hashed[2]))
+
+    def test_existing_emails_are_reported_and_the_rest_imported(self):
+        User.objects.create_user(email='taken@example.com', password='secret', first_name='Old')
+        file = io.StringIO(
+            'email,first_name\n'
+            'first@example.com,Ann\n'
+            'taken@example.com,New\n'
+            'second@example.com,Bob\n'
+            'first@example.com,Again\n'
+        )
+        report = import_users(read_rows(file, 'csv'), processes=1)
+        self.assertEqual([user.email for user in report.created], ['first@example.com', 'second@example.com'])
+        self.assertEqual(report.duplicates, [
+            (5, 'first@example.com', 'repeated, first on line 2'),
+            (3, 'taken@example.com', 'already registered'),
+        ])
+        self.assertEqual(User.objects.get(email='taken@example.com').first_name, 'Old')
+        self.assertEqual(User.objects.get(email='first@example.com').first_name, 'Ann')
+
+    def test_emails_registered_during_the_import_are_reported(self):
+        def register_meanwhile(passwords, processes):
+            User.objects.create_user(email='second@example.com', password='secret')
+            return [make_password(password) for password in passwords]
+
+        file = io.StringIO('email\nfirst@example.com\nsecond@example.com\nthird@example.com\n')
+        with mock.patch.object(user_import, 'hash_passwords', side_effect=register_meanwhile):
+            report = import_users(read_rows(file, 'csv'), processes=1)
+        self.assertEqual([user.email for user in report.created], ['first@example.com', 'third@example.com'])
+        self.assertEqual(report.duplicates, [(3, 'second@example.com', 'already registered')])
+        self.assertEqual(User.objects.filter(email__endswith='@example.com').count(), 3)
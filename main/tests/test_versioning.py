@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from main.versioning import VERSION_CACHE, bump_version, get_version
+
+
+class BumpVersionTests(TransactionTestCase):
+    def setUp(self):
+        caches[VERSION_CACHE].clear()
+        self.versions = {pk: get_version('quiz', pk) for pk in (1, 2, 3)}
+
+    def changed(self):
+        return {pk for pk, version in self.versions.items() if get_version('quiz', pk) != version}
+
+    def test_bumped_right_away_outside_a_transaction(self):
+        bump_version('quiz', 1)
+        self.assertEqual(self.changed(), {1})
+
+    def test_bumped_once_on_commit(self):
+        with mock.patch.object(caches[VERSION_CACHE], 'set_many', wraps=caches[VERSION_CACHE].set_many) as set_many:
+            with transaction.atomic():
+                bump_version('quiz', 1)
+                bump_version('quiz', 2)
+                bump_version('quiz', 1)
+                self.assertEqual(self.changed(), set())
+        set_many.assert_called_once()
+        self.assertEqual(self.changed(), {1, 2})
+
+    def test_savepoint_bumps_on_commit(self):
+        with transaction.atomic():
+            bump_version('quiz', 1)
+            with transaction.atomic():
+                bump_version('quiz', 2)
+            self.assertEqual(self.changed(), set())
+        self.assertEqual(self.changed(), {1, 2})
+
+    def test_rollback_drops_the_bumps(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                bump_version('quiz', 1)
+                raise ValueError
+        # Not carried over to the next transaction of this thread
+        with transaction.atomic():
+            bump_version('quiz', 2)
+        self.assertEqual(self.changed(), {2})
+
+    def test_savepoint_rollback_drops_its_bumps(self):
+        with transaction.atomic():
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    bump_version('quiz', 1)
+                    raise ValueError
+            bump_version('quiz', 2)
+        self.assertEqual(self.changed(), {2})
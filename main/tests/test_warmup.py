@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from main import warmup
+from main.models import Category, Course, Quiz, QuizResult, User
+from main.views import CourseDetailView
+
+
+@override_settings(WARM_UP=True, WARM_UP_URL='https://api.example.com')
+class WarmUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Grammar', slug='grammar')
+        user = User.objects.create_user(email='student@example.com', password='secret')
+        for slug in ('tenses', 'articles', 'untaken'):
+            course = Course.objects.create(title=slug.title(), slug=slug, category=category)
+            quiz = Quiz.objects.create(course=course, title=slug.title())
+            if slug != 'untaken':
+                QuizResult.objects.create(user=user, quiz=quiz, score=100, correct_answers=1)
+
+    def setUp(self):
+        cache.clear()
+        caches['versions'].clear()
+        for patcher in (mock.patch.dict(warmup.state, ready=False),
+                        # Would close the connection of the test case's transaction
+                        mock.patch.object(warmup.connections, 'close_all')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_course_pages_are_cached_for_the_public_url(self):
+        with self.assertLogs('main.warmup', 'INFO'):
+            warmup.warm_up()
+        self.assertTrue(warmup.state['ready'])
+
+        request = warmup.base_request('https://api.example.com')
+        self.assertEqual(request.build_absolute_uri('/'), 'https://api.example.com/')
+        for slug, cached in (('tenses', True), ('articles', True), ('untaken', False)):
+            entry = cache.get(CourseDetailView.get_public_cache_key(request, slug))
+            self.assertEqual(entry is not None, cached, slug)
+
+        # Served from that cache: the answer comes without loading the course and its quizzes
+        with self.assertNumQueries(1):
+            response = self.client.get('/course/tenses/', HTTP_HOST='api.example.com', HTTP_X_FORWARDED_PROTO='https')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Tenses')
+
+    @override_settings(WARM_UP_URL=None)
+    def test_course_pages_need_the_public_url(self):
+        with self.assertLogs('main.warmup', 'INFO'):
+            warmup.warm_up()
+        self.assertTrue(warmup.state['ready'])
+        self.assertIsNone(cache.get(CourseDetailView.get_public_cache_key(
+            warmup.base_request('https://api.example.com'), 'tenses',
+        )))
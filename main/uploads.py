@@ -0,0 +1,68 @@
+"""
+Content-addressed storage of TinyMCE uploads.
+
+``HashingUploadHandler`` computes the SHA-256 of an upload while it is
+received, before the other upload handlers put it in memory or a temporary
+file. ``TinyMCEImage.from_upload`` then reuses the image stored with that
+hash, if any, or stores the upload at ``uploads/tinymce/<ab>/<sha256>.<ext>``.
+As a URL of that form always has the same content, ``hashed_upload`` serves
+it with immutable cache headers.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Passes every chunk on to the next handler, and keeps the SHA-256 of each
+    uploaded file in ``digests``, by field name. Must come first in
+    ``request.upload_handlers``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hash.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self.hash.hexdigest()
+        # The file itself is the next handler's
+        return None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Media storage for files named by the hash of their content: a file that
+    exists under the name has the same content, so it is kept as it is
+    instead of being written again under another name.
+
+    A file is written under a temporary name and renamed into place, so a
+    hashed name never holds a partial file, and concurrent uploads of the
+    same content both end with the complete file.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        temporary = f'{name}.{uuid.uuid4().hex}.part'
+        try:
+            super()._save(temporary, content)
+            os.replace(self.path(temporary), self.path(name))
+        except BaseException:
+            self.delete(temporary)
+            raise
+        return name
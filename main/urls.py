@@ -1,26 +1,16 @@
 from django.urls import include, path
 from main import views
 from rest_framework import routers
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from main.views import GroupListView
 
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="API Documentation",
-      default_version='v1',
-      description="API documentation for your project",
-   ),
-   public=True,
-)
-
 router = routers.DefaultRouter()
 
 urlpatterns = [
    path('upload-image/', views.upload_image, name='upload_image'),
-   path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+   path('swagger/', views.swagger, name='schema-swagger-ui'),
    path('login/', views.LoginView.as_view(), name='login'),
+   path('logout/', views.LogoutView.as_view(), name='logout'),
    path('register/', views.RegisterView.as_view(), name='register'),
    path('user/', views.UserView.as_view(), name='user'),
    path('user/me/', views.UserMeView.as_view(), name='user'),
@@ -30,7 +20,13 @@ urlpatterns = [
    path('course/', views.CourseView.as_view(), name='course-list'),
    path('course/<slug:slug>/', views.CourseDetailView.as_view(), name='course-detail'),
    path('course/<slug:slug>/submit-quiz', views.ProcessQuizResultView.as_view(), name='submit-quiz'),
+   path('submit-quizzes/', views.ProcessQuizResultBatchView.as_view(), name='submit-quizzes'),
+   path('async/category/<slug:slug>/', views.AsyncCourseCategoryDetailView.as_view(), name='async-course-category-detail'),
+   path('async/course/', views.AsyncCourseView.as_view(), name='async-course-list'),
+   path('async/course/<slug:slug>/', views.AsyncCourseDetailView.as_view(), name='async-course-detail'),
+   path('async/course/<slug:slug>/submit-quiz', views.AsyncProcessQuizResultView.as_view(), name='async-submit-quiz'),
    path('groups/', GroupListView.as_view(), name='group-list'),
    path('quote/', views.quotes, name='quote'),
+   path('ready/', views.ready, name='ready'),
    path('', include(router.urls)),
 ]
\ No newline at end of file
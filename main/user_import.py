@@ -0,0 +1,162 @@
+"""
+Bulk import of users, e.g. all students of a school into their groups.
+
+Rows come from CSV (with a header) or JSON Lines files with the keys
+``email``, ``password``, ``first_name``, ``last_name`` and ``group`` (a
+group name, created if missing). Only ``email`` is required; rows without a
+password get an unusable one.
+
+Passwords are hashed on a pool of processes and users are inserted with
+chunked bulk inserts. Rows whose email is already registered or repeated in
+the file are reported as duplicates and skipped, the rest is imported.
+Used by the ``import_users`` command and the group admin.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from main.models import Group, User
+
+
+# Key of the rows read_rows could not parse, with the reason. Not a string,
+# so no CSV column or JSON key can be mistaken for it.
+ROW_ERROR = object()
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = []
+        self.duplicates = []  # (line, email, reason)
+        self.errors = []  # (line, message)
+
+    def __str__(self):
+        return f'{len(self.created)} created, {len(self.duplicates)} duplicates, {len(self.errors)} errors'
+
+
+def read_rows(file, format=None):
+    """
+    Yield ``(line, row)`` from a CSV or JSON Lines file object (text or
+    binary). ``format`` is ``csv`` or ``jsonl``, guessed from the file name
+    when not given.
+    """
+    if format is None:
+        name = getattr(file, 'name', '') or ''
+        format = 'jsonl' if name.endswith(('.jsonl', '.json')) else 'csv'
+    if isinstance(file.read(0), bytes):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig')
+
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                try:
+                    row = json.loads(text)
+                except ValueError as e:
+                    yield line, {ROW_ERROR: f'invalid JSON: {e}'}
+                    continue
+                if isinstance(row, dict):
+                    yield line, row
+                else:
+                    yield line, {ROW_ERROR: f'expected a JSON object, got {type(row).__name__}'}
+
+
+def hash_passwords(passwords, processes=None):
+    """``make_password`` for each password, spread over ``processes`` processes."""
+    processes = processes or os.cpu_count() or 1
+    to_hash = [password for password in passwords if password]
+    if processes == 1 or len(to_hash) < 2:
+        hashed = iter([make_password(password) for password in to_hash])
+    else:
+        # Spawned rather than forked: the caller may be a server process with
+        # other threads (e.g. the group admin under gunicorn's gthread
+        # workers), whose locks and connections a fork would copy mid-use.
+        # They set Django up before importing anything of this project.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=django.setup) as executor:
+            chunksize = max(1, len(to_hash) // (processes * 4))
+            hashed = iter(list(executor.map(make_password, to_hash, chunksize=chunksize)))
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+def import_users(rows, group=None, batch_size=1000, processes=None):
+    """
+    Create users from ``(line, row)`` pairs (see ``read_rows``); ``group``
+    is used for rows that do not name one. Returns an ``ImportReport``.
+    """
+    report = ImportReport()
+    seen = {}
+    valid = []
+    for line, row in rows:
+        if ROW_ERROR in row:
+            report.errors.append((line, row[ROW_ERROR]))
+            continue
+        email = User.objects.normalize_email((row.get('email') or '').strip())
+        try:
+            validate_email(email)
+        except ValidationError:
+            report.errors.append((line, f'invalid email {email!r}'))
+            continue
+        if email in seen:
+            report.duplicates.append((line, email, f'repeated, first on line {seen[email]}'))
+            continue
+        seen[email] = line
+        valid.append((line, email, row))
+
+    existing = set()
+    emails = [email for _, email, _ in valid]
+    for start in range(0, len(emails), batch_size):
+        existing.update(User.objects.filter(email__in=emails[start:start + batch_size]).values_list('email', flat=True))
+    new = []
+    for line, email, row in valid:
+        if email in existing:
+            report.duplicates.append((line, email, 'already registered'))
+        else:
+            new.append((line, email, row))
+
+    groups = {}
+    for _, _, row in new:
+        name = (row.get('group') or '').strip()
+        if name and name not in groups:
+            groups[name] = Group.objects.filter(name=name).first() or Group.objects.create(name=name)
+
+    passwords = hash_passwords([row.get('password') or None for _, _, row in new], processes)
+    users = [
+        (line, User(
+            email=email,
+            username=email,
+            first_name=(row.get('first_name') or '').strip(),
+            last_name=(row.get('last_name') or '').strip(),
+            password=password,
+            group=groups.get((row.get('group') or '').strip(), group),
+        ))
+        for (line, email, row), password in zip(new, passwords)
+    ]
+
+    for start in range(0, len(users), batch_size):
+        chunk = users[start:start + batch_size]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in chunk])
+            report.created.extend(user for _, user in chunk)
+        except IntegrityError:
+            # Someone registered one of these emails meanwhile; find out who one by one
+            for line, user in chunk:
+                try:
+                    with transaction.atomic():
+                        user.save()
+                    report.created.append(user)
+                except IntegrityError:
+                    report.duplicates.append((line, user.email, 'already registered'))
+    return report
@@ -0,0 +1,90 @@
+"""
+Version tokens for cached content.
+
+Cached entries that are derived from database rows put the version token of
+their scope into the cache key. Changing those rows bumps the token, so stale
+entries are never read again and simply expire.
+
+Tokens live in the shared ``versions`` cache so that every worker process
+sees a bump, while the (larger) cached payloads can stay in a per-process
+cache.
+
+Scopes in use (see main/signals.py):
+
+* ``quiz``     - answer key of a quiz
+* ``course``   - everything shown on a course detail page
+* ``category`` - a category and the courses listed in it
+* ``catalog``  - (pk ``all``) the category list and the course list
+* ``results``  - (pk is a user id) the quiz results of one user
+* ``users``    - (pk ``denied``) inactive and deleted users, see main/authentication.py
+* ``revoked``  - (pk ``all``) revoked access tokens, see main/revocation.py
+"""
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+
+VERSION_CACHE = 'versions'
+
+
+def _version_key(scope, pk):
+    return f'version:{scope}:{pk}'
+
+
+def new_token():
+    # Nanosecond timestamps are unique enough across workers and, unlike a
+    # counter, a token can never go back to a value that was used before.
+    return format(time.time_ns(), 'x')
+
+
+def get_version(scope, pk):
+    return get_versions(scope, [pk])[pk]
+
+
+def get_versions(scope, pks):
+    """Return ``{pk: token}`` for the given primary keys, creating missing tokens."""
+    cache = caches[VERSION_CACHE]
+    keys = {_version_key(scope, pk): pk for pk in pks}
+    found = cache.get_many(keys)
+    versions = {keys[key]: token for key, token in found.items()}
+    for key, pk in keys.items():
+        if pk not in versions:
+            token = new_token()
+            if not cache.add(key, token, timeout=None):
+                token = cache.get(key, token)
+            versions[pk] = token
+    return versions
+
+
+def bump_version(scope, pk):
+    """
+    Invalidate everything cached for ``scope``/``pk`` once the current
+    transaction commits, or right away outside a transaction. Bumps
+    requested during one transaction (e.g. an admin save that touches many
+    inline rows) are coalesced, so each scope is bumped once no matter how
+    many rows changed. They are dropped with the transaction, or savepoint,
+    if it rolls back.
+    """
+    connection = transaction.get_connection()
+    savepoint_ids = set(connection.savepoint_ids)
+    for sids, callback, _ in connection.run_on_commit:
+        if isinstance(callback, PendingBumps) and sids == savepoint_ids and not callback.done:
+            callback.add((scope, pk))
+            return
+    transaction.on_commit(PendingBumps([(scope, pk)]))
+
+
+class PendingBumps(set):
+    """
+    The ``(scope, pk)`` pairs to bump when a transaction commits, registered
+    with ``on_commit`` once per transaction (and savepoint): Django forgets
+    it along with the other callbacks of a transaction or savepoint that
+    rolls back.
+    """
+    done = False
+
+    def __call__(self):
+        self.done = True
+        token = new_token()
+        caches[VERSION_CACHE].set_many({_version_key(scope, pk): token for scope, pk in self}, timeout=None)
@@ -1,3 +1,6 @@
-from .auth import LoginView, RegisterView
-from .course import CourseCategoryView, CourseCategoryDetailView, CourseView, CourseDetailView, ProcessQuizResultView, EnrollmentView
-from .user import UserView, UserMeView, upload_image, GroupListView, quotes
\ No newline at end of file
+from .auth import LoginView, LogoutView, RegisterView
+from .course import CourseCategoryView, CourseCategoryDetailView, CourseView, CourseDetailView, ProcessQuizResultView, ProcessQuizResultBatchView, EnrollmentView
+from .course_async import AsyncCourseView, AsyncCourseDetailView, AsyncCourseCategoryDetailView, AsyncProcessQuizResultView
+from .health import ready
+from .schema import swagger
+from .user import UserView, UserMeView, upload_image, hashed_upload, GroupListView, quotes
\ No newline at end of file
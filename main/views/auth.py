@@ -1,13 +1,14 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from main.authentication import ClaimsAccessToken
+from main.helpers import serialized_write
+from main.revocation import revoke
 from rest_framework import generics
 
 import main.serializers as serializers
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from main.schema import openapi, swagger_auto_schema
 
 
 
@@ -36,7 +37,7 @@ class LoginView(APIView):
         serializer = serializers.LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = AccessToken.for_user(user)
+            refresh = ClaimsAccessToken.for_user(user)
             return Response(
                 {
                     "user": {
@@ -85,4 +86,41 @@ class RegisterView(generics.CreateAPIView):
                 "user": serializers.RegisterSerializer(user, context=self.get_serializer_context()).data,
                 "message": "User Created Successfully.  Now perform Login to get your token",
             }
-        )
\ No newline at end of file
+        )
+
+
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Log out: revoke the access token sent with this request.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="JWT token for authentication",
+                type=openapi.TYPE_STRING,
+                required=True,
+                default='Bearer '
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Token revoked",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'success': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="Success status")
+                    }
+                )
+            ),
+            401: openapi.Response(
+                description="Missing, invalid or already revoked token"
+            )
+        }
+    )
+    def post(self, request):
+        with serialized_write():
+            revoke(request.auth)
+        return Response({"success": True}, status=status.HTTP_200_OK)
@@ -1,19 +1,23 @@
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from rest_framework import status, mixins, generics, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from main.helpers import StandartPagination
-from main.serializers import QuizResultProcessSerializer, CategorySerializer, CourseDetailSerializer, CategoryDetailSerializer, CourseSerializer
+from main.authentication import ClaimsJWTAuthentication
+from main.helpers import StandartPagination, OptionalCursorPagination, ConditionalGetMixin, ReplicaReadsMixin, serialized_write
+from main.serializers import QuizResultProcessSerializer, QuizResultBatchSerializer, CategorySerializer, CourseDetailSerializer, CategoryDetailSerializer, CourseSerializer, QuizResultSerializer
+from main.routers import primary
+from main.versioning import get_version
 from main.models import Category, Course, Quiz, Question, Option, Enrollment, QuizResult
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from main.schema import openapi, swagger_auto_schema
 
 
 
 
 class ProcessQuizResultView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 5
 
     @swagger_auto_schema(
         operation_description="Process a quiz result and return the score and correct answers.",
@@ -48,7 +52,8 @@ class ProcessQuizResultView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = QuizResultProcessSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            quiz_result = serializer.save()
+            with serialized_write():
+                quiz_result = serializer.save()
             return Response(
                 {
                     'quiz_result_id': quiz_result.id, 
@@ -60,50 +65,137 @@ class ProcessQuizResultView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+
+class ProcessQuizResultBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 6
+
+    @swagger_auto_schema(
+        operation_description="Process many quiz results at once (e.g. submissions queued while offline). "
+                              "Each submission is graded independently and all results are stored in one transaction.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="JWT token for authentication",
+                type=openapi.TYPE_STRING,
+                required=True,
+                default='Bearer '
+            )
+        ],
+        request_body=QuizResultBatchSerializer,
+        responses={
+            201: openapi.Response(
+                description="Per-submission results, in the order they were sent",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'success': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="Whether the submission was stored"),
+                                    'quiz_result_id': openapi.Schema(type=openapi.TYPE_INTEGER, description="Quiz result ID"),
+                                    'score': openapi.Schema(type=openapi.TYPE_INTEGER, description="Score obtained in the quiz"),
+                                    'correct_answers': openapi.Schema(type=openapi.TYPE_INTEGER, description="Number of correct answers"),
+                                    'detail': openapi.Schema(type=openapi.TYPE_OBJECT, description="Validation errors of a rejected submission, by field (quiz, answers or non_field_errors)")
+                                }
+                            )
+                        )
+                    }
+                )
+            ),
+            400: openapi.Response(
+                description="Bad Request: Invalid input data or no submission could be processed"
+            )
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = QuizResultBatchSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            with serialized_write():
+                results = serializer.save()
+            created = any(result["success"] for result in results)
+            return Response(
+                {'results': results},
+                status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     
-class CourseCategoryView(generics.ListAPIView):
+class CourseCategoryView(ReplicaReadsMixin, ConditionalGetMixin, generics.ListAPIView):
     """
     Retrieve a list of all Course instances
     """
+    authentication_classes = [ClaimsJWTAuthentication]
     pagination_class = None
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     permission_classes = [AllowAny]
+    query_budget = 2
+    version_scope = 'catalog'
 
 
-class CourseCategoryDetailView(generics.RetrieveAPIView):
+class CourseCategoryDetailView(ReplicaReadsMixin, ConditionalGetMixin, generics.RetrieveAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     queryset = Category.objects.all()
     serializer_class = CategoryDetailSerializer
     lookup_field = 'slug'
+    query_budget = 5
+    version_scope = 'category'
+    version_model = Category
     
     @swagger_auto_schema(
-        operation_description="Retrieve detailed information about a course category, including its courses. Optionally, filter the courses by a 'level' query parameter (e.g., ?level=a1).",
+        operation_description="Retrieve detailed information about a course category, including a page of its courses and course counts per level. Optionally, filter the courses by a 'level' query parameter (e.g., ?level=a1). Follow 'courses_next' / 'courses_previous' for more courses.",
         manual_parameters=[
             openapi.Parameter(
                 'level',
                 openapi.IN_QUERY,
                 description="Filter courses by level (e.g., a1)",
                 type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from 'courses_next' or 'courses_previous'",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of courses per page (max 100)",
+                type=openapi.TYPE_INTEGER
             )
         ]
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def retrieve(self, request, *args, **kwargs):
+        category = self.get_object()
+        context = self.get_serializer_context()
+        context['course_page'] = CategoryDetailSerializer.paginate_courses(category, request)
+        return Response(CategoryDetailSerializer(category, context=context).data)
+
 
-class CourseView(generics.ListAPIView):
+class CourseView(ReplicaReadsMixin, ConditionalGetMixin, generics.ListAPIView):
     """
     Retrieve a list of all Course instances
     """
-    pagination_class = StandartPagination
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = OptionalCursorPagination
     serializer_class = CourseSerializer
-    queryset = Course.objects.all()
+    queryset = CourseSerializer.setup_eager_loading(Course.objects.order_by('id'))
     permission_classes = [AllowAny]
+    query_budget = 4
+    version_scope = 'catalog'
 
 
 
 class EnrollmentView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 5
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -147,8 +239,9 @@ class EnrollmentView(APIView):
     )
     def post(self, request, slug):
         course = get_object_or_404(Course, slug=slug)
-        enrollment, created = Enrollment.objects.get_or_create(
-            user=request.user, course=course)
+        with serialized_write():
+            enrollment, created = Enrollment.objects.get_or_create(
+                user=request.user, course=course)
         if created:
             return Response(
                 {
@@ -164,13 +257,14 @@ class EnrollmentView(APIView):
 
     
 
-class CourseDetailView(generics.RetrieveAPIView):
+class CourseDetailView(ReplicaReadsMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     """
     Retrieve a single Course instance by its slug, with related quizzes, questions, options, and results.
     """
+    authentication_classes = [ClaimsJWTAuthentication]
     # Define the queryset with prefetch_related for performance optimization
-    queryset = Course.objects.prefetch_related(
-        'quizzes__questions__options', 'quizzes__results'
+    queryset = Course.objects.select_related('category').prefetch_related(
+        'quizzes__questions__options', 'quizzes__fill_blank_questions__options'
     )
     
     # Set the lookup field to 'slug' (instead of the default 'pk')
@@ -181,6 +275,63 @@ class CourseDetailView(generics.RetrieveAPIView):
     
     # Optional: Explicitly allow any user to access this view (matches original behavior)
     permission_classes = [AllowAny]
+    query_budget = 9
+    version_scope = 'course'
+    version_model = Course
+
+    # The public part of a course is cached per course version (bumped by
+    # main.signals), the user's quiz results are merged in on every request.
+    cache_timeout = 60 * 60
+
+    def get_public_data(self):
+        """
+        Return the representation shared by every user, from the cache when
+        the course has not changed since it was stored.
+        """
+        cache_key = self.get_public_cache_key(self.request, self.kwargs[self.lookup_field])
+        entry = cache.get(cache_key)
+        if entry and get_version('course', entry['course_id']) == entry['version']:
+            return entry['data']
+
+        # Cached data must not come from a replica that is behind the version
+        with primary():
+            course = self.get_object()
+            version = get_version('course', course.pk)
+            data = self.get_serializer(course, context={**self.get_serializer_context(), 'public': True}).data
+        cache.set(cache_key, {'course_id': course.pk, 'version': version, 'data': data}, self.cache_timeout)
+        return data
+
+    @staticmethod
+    def get_public_cache_key(request, slug):
+        return f'course-detail:{request.build_absolute_uri("/")}:{slug}'
+
+    @staticmethod
+    def get_user_results(data, user):
+        quiz_ids = [quiz['id'] for quiz in data['quizzes']]
+        return QuizResult.objects.filter(user_id=user.pk, quiz_id__in=quiz_ids).order_by('pk')
+
+    @staticmethod
+    def merge_user_results(data, quiz_results):
+        """Add the first of ``quiz_results`` for each quiz to the public data."""
+        results = {}
+        for quiz_result in quiz_results:
+            results.setdefault(quiz_result.quiz_id, quiz_result)
+
+        for quiz in data['quizzes']:
+            quiz_result = results.get(quiz['id'])
+            quiz['result'] = QuizResultSerializer(quiz_result).data if quiz_result else None
+            quiz['is_completed'] = quiz_result is not None
+        return data
+
+    def add_user_results(self, data, user):
+        return self.merge_user_results(data, self.get_user_results(data, user))
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_public_data()
+        if request.user.is_authenticated:
+            data = self.add_user_results(data, request.user)
+        return Response(data)
+
     @swagger_auto_schema(    
         operation_description="Retrieve detailed information about a course, including its quizzes, questions, options, and results.",
         manual_parameters=[
@@ -0,0 +1,230 @@
+"""
+Async variants of the catalog and quiz endpoints, served under ``async/``.
+
+Under an ASGI server (``uvicorn config.asgi:application``) a request to these
+views does not hold a thread while it waits for the database or for a slow
+client to download a large course: queries go through Django's async ORM,
+and only the parts without an async counterpart (token authentication, the
+version cache, DRF's cursor pagination, transactions) run in
+``sync_to_async``. The response bodies are those of the views in
+main/views/course.py.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException, AuthenticationFailed, MethodNotAllowed, NotAuthenticated, NotFound, PermissionDenied,
+)
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from main.authentication import ClaimsJWTAuthentication, RevocableJWTAuthentication
+from main.helpers import OptionalCursorPagination, get_etag, serialized_write, set_etag
+from main.models import Category
+from main.routers import primary, use_replica
+from main.serializers import CategoryDetailSerializer, CourseDetailSerializer, CourseSerializer, QuizResultProcessSerializer
+from main.serializers.course import CourseListSerializer
+from main.versioning import get_version
+from main.views.course import CourseCategoryDetailView, CourseDetailView, CourseView, ProcessQuizResultView
+
+
+class AsyncAPIView(View):
+    """
+    What the async views need of DRF's ``APIView``: token authentication,
+    permissions, JSON responses and errors in DRF's format.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [AllowAny]
+    parser_classes = [JSONParser]
+    renderer_class = JSONRenderer
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authenticated by token, not by session, like APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.authenticators = [authentication() for authentication in self.authentication_classes]
+        request = self.request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            request.user, request.auth = await sync_to_async(self.authenticate)(request)
+            self.check_permissions(request)
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise MethodNotAllowed(request.method)
+            return await handler(request, *args, **kwargs)
+        except (APIException, Http404) as exc:
+            return self.handle_exception(exc)
+
+    def authenticate(self, request):
+        for authenticator in self.authenticators:
+            user_auth_tuple = authenticator.authenticate(request)
+            if user_auth_tuple is not None:
+                return user_auth_tuple
+        return AnonymousUser(), None
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                raise PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            exc = NotFound(*exc.args)
+        headers = {}
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            headers['WWW-Authenticate'] = self.authenticators[0].authenticate_header(self.request)
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = '%d' % exc.wait
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return self.render(data, exc.status_code, headers)
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'format': None, 'view': self}
+
+    def render(self, data, status=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            self.renderer_class().render(data), status=status, headers=headers,
+            content_type=self.renderer_class.media_type,
+        )
+
+
+class AsyncCatalogView(AsyncAPIView):
+    """
+    A read-only catalog endpoint, whose ``get_data`` returns the response
+    data. Reads from a replica like ``ReplicaReadsMixin`` and answers
+    conditional requests like ``ConditionalGetMixin``, with the same
+    ``version_scope`` and ``version_model``.
+    """
+    version_scope = None
+    version_model = None
+    lookup_field = 'slug'
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.version_scope is None:
+            raise ImproperlyConfigured(f'{type(self).__name__} must set version_scope')
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get_version_keys(self):
+        if self.version_model is None:
+            return [(self.version_scope, 'all')]
+        lookup = {self.lookup_field: self.kwargs[self.lookup_field]}
+        pk = await self.version_model.objects.filter(**lookup).values_list('pk', flat=True).afirst()
+        return None if pk is None else [(self.version_scope, pk)]
+
+    async def get(self, request, *args, **kwargs):
+        if settings.DATABASE_REPLICAS:
+            await sync_to_async(use_replica)(request.user)
+        version_keys = await self.get_version_keys()
+        if version_keys is None:
+            return self.render(await self.get_data(request, *args, **kwargs))
+
+        etag = await sync_to_async(get_etag)(request, version_keys, self.renderer_class.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.render(await self.get_data(request, *args, **kwargs))
+        set_etag(response, etag)
+        return response
+
+
+class AsyncCourseView(AsyncCatalogView):
+    """Async ``CourseView``."""
+    pagination_class = OptionalCursorPagination
+    query_budget = CourseView.query_budget
+    version_scope = CourseView.version_scope
+
+    async def get_data(self, request):
+        paginator = self.pagination_class()
+        courses = await paginator.apaginate_queryset(CourseView.queryset.all(), request, self)
+        if request.user.is_authenticated and courses:
+            await CourseListSerializer.aattach_user_results(courses, request.user)
+        data = CourseSerializer(courses, many=True, context=self.get_serializer_context()).data
+        return paginator.get_paginated_response(data).data
+
+
+class AsyncCourseCategoryDetailView(AsyncCatalogView):
+    """Async ``CourseCategoryDetailView``."""
+    query_budget = CourseCategoryDetailView.query_budget
+    version_scope = CourseCategoryDetailView.version_scope
+    version_model = CourseCategoryDetailView.version_model
+
+    async def get_data(self, request, slug):
+        category = await aget_object_or_404(Category, slug=slug)
+        # The courses are paged through with DRF's cursor pagination
+        return await sync_to_async(self.serialize)(category, request)
+
+    def serialize(self, category, request):
+        context = self.get_serializer_context()
+        context['course_page'] = CategoryDetailSerializer.paginate_courses(category, request)
+        return CategoryDetailSerializer(category, context=context).data
+
+
+class AsyncCourseDetailView(AsyncCatalogView):
+    """Async ``CourseDetailView``, sharing its cache of the public data."""
+    queryset = CourseDetailView.queryset
+    cache_timeout = CourseDetailView.cache_timeout
+    query_budget = CourseDetailView.query_budget
+    version_scope = CourseDetailView.version_scope
+    version_model = CourseDetailView.version_model
+
+    async def get_public_data(self, slug):
+        cache_key = CourseDetailView.get_public_cache_key(self.request, slug)
+        entry = await cache.aget(cache_key)
+        if entry and await sync_to_async(get_version)('course', entry['course_id']) == entry['version']:
+            return entry['data']
+
+        with primary():
+            course = await aget_object_or_404(self.queryset, slug=slug)
+            version = await sync_to_async(get_version)('course', course.pk)
+            # The quizzes are prefetched, but the images in the content are looked up
+            data = await sync_to_async(self.serialize)(course)
+        await cache.aset(cache_key, {'course_id': course.pk, 'version': version, 'data': data}, self.cache_timeout)
+        return data
+
+    def serialize(self, course):
+        return CourseDetailSerializer(course, context={**self.get_serializer_context(), 'public': True}).data
+
+    async def get_data(self, request, slug):
+        data = await self.get_public_data(slug)
+        if request.user.is_authenticated:
+            quiz_results = [quiz_result async for quiz_result in CourseDetailView.get_user_results(data, request.user)]
+            data = CourseDetailView.merge_user_results(data, quiz_results)
+        return data
+
+
+class AsyncProcessQuizResultView(AsyncAPIView):
+    """Async ``ProcessQuizResultView``."""
+    authentication_classes = [RevocableJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    query_budget = ProcessQuizResultView.query_budget
+
+    async def post(self, request, *args, **kwargs):
+        # Saving takes a transaction, which the async ORM has no API for
+        return await sync_to_async(self.submit)(request)
+
+    def submit(self, request):
+        serializer = QuizResultProcessSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        with serialized_write():
+            quiz_result = serializer.save()
+        return self.render(
+            {
+                'quiz_result_id': quiz_result.id,
+                'score': quiz_result.score,
+                'correct_answers': quiz_result.correct_answers
+            },
+            status.HTTP_201_CREATED
+        )
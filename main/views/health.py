@@ -0,0 +1,11 @@
+from django.http import JsonResponse
+
+from main.warmup import state
+
+
+def ready(request):
+    """Readiness probe: 503 until this process has warmed up (see main/warmup.py)."""
+    return JsonResponse(
+        {'ready': state['ready'], 'warm_up_seconds': state['seconds']},
+        status=200 if state['ready'] else 503,
+    )
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime, timezone
+from functools import cache
+
+from django.conf import settings
+from django.http import FileResponse
+from django.views.decorators.http import condition
+
+from main.schema import get_schema_view
+
+
+def schema_last_modified(request, *args, **kwargs):
+    if request.GET.get('format') != 'openapi':
+        return None
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(settings.OPENAPI_SCHEMA_FILE), timezone.utc)
+    except OSError:
+        return None
+
+
+@cache
+def swagger_ui_view():
+    return get_schema_view().with_ui('swagger', cache_timeout=0)
+
+
+@condition(last_modified_func=schema_last_modified)
+def swagger(request, *args, **kwargs):
+    """
+    The Swagger UI, and at ``?format=openapi`` the schema it shows, read from
+    the file written by ``manage.py generate_schema``. Without that file the
+    schema is generated by drf_yasg on every request.
+    """
+    if request.GET.get('format') == 'openapi':
+        try:
+            schema = open(settings.OPENAPI_SCHEMA_FILE, 'rb')
+        except FileNotFoundError:
+            pass
+        else:
+            return FileResponse(schema, content_type='application/openapi+json; charset=utf-8')
+    return swagger_ui_view()(request, *args, **kwargs)
@@ -4,12 +4,16 @@ from rest_framework import status, mixins, generics, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from main.helpers import StandartPagination
+from main.authentication import ClaimsJWTAuthentication
+from main.helpers import StandartPagination, ReplicaReadsMixin
 from main.serializers import QuizResultProcessSerializer, CategorySerializer, CourseDetailSerializer, CategoryDetailSerializer, CourseSerializer, GroupSerializer
 from main.models import Category, Course, Quiz, Question, Option, Enrollment, QuizResult, TinyMCEImage, Group
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from main.schema import openapi, swagger_auto_schema
+from main.uploads import HashingUploadHandler
+from django.conf import settings
 from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from urllib.parse import urljoin
@@ -17,6 +21,7 @@ from urllib.parse import urljoin
 
 class UserView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     @swagger_auto_schema(
       manual_parameters=[
@@ -55,7 +60,7 @@ class UserView(APIView):
     def get(self, request):
         user = request.user
         enrolled_courses = Enrollment.objects.filter(user=user).values_list('course', flat=True)
-        courses = Course.objects.filter(id__in=enrolled_courses)
+        courses = CourseSerializer.setup_eager_loading(Course.objects.filter(id__in=enrolled_courses))
         serializer = CourseSerializer(courses, context={'request': request},  many=True)
         return Response(serializer.data)
     
@@ -63,6 +68,7 @@ class UserView(APIView):
 
 class UserMeView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -243,7 +249,11 @@ def upload_image(request):
     """Handle image uploads from TinyMCE editor."""
     if request.method != 'POST':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
-    
+
+    # Hash the upload while it is received, before request.FILES parses it
+    hashing = HashingUploadHandler(request)
+    request.upload_handlers.insert(0, hashing)
+
     if 'file' not in request.FILES:
         return JsonResponse({'error': 'No file uploaded'}, status=400)
     
@@ -253,10 +263,8 @@ def upload_image(request):
     if not uploaded_file.content_type.startswith('image/'):
         return JsonResponse({'error': 'File is not an image'}, status=400)
     
-    # Create a new image record
-    image = TinyMCEImage(title=uploaded_file.name)
-    image.image = uploaded_file
-    image.save()
+    # The image uploaded before with the same content, or a new record
+    image = TinyMCEImage.from_upload(uploaded_file, hashing.digests['file'])
     
     # Get the absolute URL by combining the site URL with the media URL
     site_url = request.build_absolute_uri('/').rstrip('/')
@@ -276,7 +284,21 @@ def upload_image(request):
         'success': True
     })
 
-class GroupListView(generics.ListAPIView):
+def hashed_upload(request, path):
+    """
+    A content-addressed TinyMCE upload (see main/uploads.py), when DEBUG is
+    on. Its URL changes whenever its content would, so browsers may cache it
+    for good; in production the front server serves media, and should send
+    the same Cache-Control for /media/uploads/tinymce/<ab>/<sha256>.<ext>.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
+
+
+class GroupListView(ReplicaReadsMixin, generics.ListAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
-    pagination_class = None
\ No newline at end of file
+    pagination_class = None
+    query_budget = 2
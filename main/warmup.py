@@ -0,0 +1,80 @@
+"""
+Warm-up of a server process before it takes traffic.
+
+``warm_up`` compiles the answer keys of the quizzes submitted most recently
+(at most ``WARM_UP_QUIZZES``) into the cache and, when ``WARM_UP_URL`` is
+set, caches the public data of their courses' detail pages as served at
+that URL. It also loads the per-process deny-set and revocation filter and
+the URLconf, which imports the views. gunicorn.conf.py runs it in the
+master process before the workers are forked, so every worker starts warm,
+and config/asgi.py at the ASGI lifespan startup; the ``/ready/`` endpoint
+reports ready only once it is done.
+"""
+import io
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import get_resolver
+
+from main.authentication import denied_user_ids
+from main.grading import get_answer_keys
+from main.models import Course, QuizResult
+from main.revocation import revocation_list
+
+
+logger = logging.getLogger(__name__)
+
+state = {'ready': False, 'seconds': None}
+
+
+def recent_quiz_ids(count, results=10000):
+    """Up to ``count`` quizzes among those of the latest ``results`` submissions, the latest first."""
+    latest = QuizResult.objects.order_by('-pk').values_list('quiz_id', flat=True)[:results]
+    return list(dict.fromkeys(latest))[:count]
+
+
+def base_request(url):
+    """A GET request for the root of ``url``, e.g. ``https://api.example.com``."""
+    url = urlsplit(url)
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/', 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+        'SERVER_NAME': url.hostname, 'SERVER_PORT': str(url.port or (443 if url.scheme == 'https' else 80)),
+        'HTTP_HOST': url.netloc, 'wsgi.url_scheme': url.scheme, 'wsgi.input': io.BytesIO(),
+    })
+
+
+def cache_course_pages(course_slugs, url):
+    """Cache the public data of the courses' detail pages, as served at ``url``."""
+    from main.views import CourseDetailView
+
+    request = base_request(url)
+    for slug in course_slugs:
+        view = CourseDetailView()
+        view.setup(request, slug=slug)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        view.get_public_data()
+
+
+def warm_up():
+    """Warm this process up, unless ``WARM_UP`` is off, and mark it ready."""
+    if state['ready']:
+        return
+    start = time.perf_counter()
+    if settings.WARM_UP:
+        quiz_ids = recent_quiz_ids(settings.WARM_UP_QUIZZES)
+        get_answer_keys(quiz_ids)
+        if settings.WARM_UP_URL:
+            slugs = Course.objects.filter(quizzes__in=quiz_ids).values_list('slug', flat=True).distinct()
+            cache_course_pages(slugs, settings.WARM_UP_URL)
+        denied_user_ids()
+        revocation_list.refresh()
+        get_resolver().url_patterns
+        # Forked workers must not share the connections opened here
+        connections.close_all()
+    state.update(ready=True, seconds=time.perf_counter() - start)
+    logger.info('Warmed up in %.2fs', state['seconds'])